@@ -58,11 +58,43 @@ class Tetromino:
         return rotated
 
 
-class TetrisGame:
+class RealClock:
     def __init__(self):
+        self.clock = pygame.time.Clock()
+
+    def now(self):
+        return pygame.time.get_ticks()
+
+    def tick(self, fps):
+        return self.clock.tick(fps)
+
+    def wait(self, ms):
+        pygame.time.wait(ms)
+
+
+class VirtualClock:
+    # Time only moves when the game ticks or waits, so nothing sleeps
+    def __init__(self, frame_ms=None):
+        self.frame_ms = frame_ms  # None means one 1000 / fps frame per tick
+        self.time = 0
+
+    def now(self):
+        return self.time
+
+    def tick(self, fps):
+        step = self.frame_ms if self.frame_ms is not None else 1000 / fps
+        self.time += step
+        return step
+
+    def wait(self, ms):
+        self.time += ms
+
+
+class TetrisGame:
+    def __init__(self, clock=None):
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption('Tetris')
-        self.clock = pygame.time.Clock()
+        self.clock = clock if clock is not None else RealClock()
         self.grid = [[BLACK for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
         self.current_piece = None
         self.game_over = False
@@ -70,7 +102,7 @@ class TetrisGame:
         self.font = pygame.font.Font(None, 36)
         self.fall_time = 0
         self.fall_speed = 500  # Time in milliseconds
-        self.last_fall = pygame.time.get_ticks()
+        self.last_fall = self.clock.now()
 
     def new_piece(self):
         self.current_piece = Tetromino(GRID_WIDTH // 2 - 1, 0)
@@ -138,11 +170,14 @@ class TetrisGame:
         score_text = self.font.render(f'Score: {self.score}', True, WHITE)
         self.screen.blit(score_text, (GRID_WIDTH * BLOCK_SIZE + 10, 10))
 
-    def run(self):
+    def run(self, duration_ms=None):
         self.new_piece()
+        start = self.clock.now()
 
         while not self.game_over:
-            current_time = pygame.time.get_ticks()
+            current_time = self.clock.now()
+            if duration_ms is not None and current_time - start > duration_ms:
+                return
 
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
@@ -165,13 +200,13 @@ class TetrisGame:
                         if not self.valid_move(self.current_piece, self.current_piece.x, self.current_piece.y):
                             self.current_piece.shape = old_shape
 
-            # Handle automatic falling
-            if current_time - self.last_fall > self.fall_speed:
+            # Handle automatic falling, one step per fall_speed interval however long the frame was
+            while not self.game_over and current_time - self.last_fall > self.fall_speed:
                 if self.valid_move(self.current_piece, self.current_piece.x, self.current_piece.y + 1):
                     self.current_piece.y += 1
                 else:
                     self.lock_piece(self.current_piece)
-                self.last_fall = current_time
+                self.last_fall += self.fall_speed
 
             # Draw everything
             self.screen.fill(BLACK)
@@ -187,7 +222,7 @@ class TetrisGame:
                          (SCREEN_WIDTH // 2 - game_over_text.get_width() // 2,
                           SCREEN_HEIGHT // 2 - game_over_text.get_height() // 2))
         pygame.display.flip()
-        pygame.time.wait(2000)
+        self.clock.wait(2000)
 
 
 if __name__ == '__main__':
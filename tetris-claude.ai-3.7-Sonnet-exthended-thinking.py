@@ -1,9 +1,29 @@
-import pygame
+import argparse
+import asyncio
+import copy
+import math
+import multiprocessing
+import os
 import random
+import sys
 import time
+import tracemalloc
+from collections import namedtuple
 
-# Initialize pygame
-pygame.init()
+try:
+    import pygame
+except ImportError:  # Only TetrisGame needs pygame; TetrisCore runs headless without it
+    pygame = None
+
+try:
+    import numpy as np
+except ImportError:  # Only BatchTetrisCore needs numpy
+    np = None
+
+try:
+    import curses
+except ImportError:  # Only the terminal front-end needs curses (missing on Windows)
+    curses = None
 
 # Colors
 BLACK = (0, 0, 0)
@@ -32,6 +52,32 @@ INITIAL_FALL_SPEED = 0.5  # Blocks per second
 LEVEL_SPEED_INCREASE = 0.05
 LINES_PER_LEVEL = 10
 
+# Window input: keys, auto-repeat and gravity run on a fixed logic tick, independent of FPS
+LOGIC_HZ = 1000  # Input polls per second in TetrisGame.run
+DAS_MS = 167  # Delayed auto-shift: how long left/right is held before it starts repeating
+ARR_MS = 33  # Auto-repeat rate: milliseconds between shifts once DAS has charged
+SOFT_DROP_REPEAT_MS = 33  # A held down arrow repeats at this interval with no initial delay
+LATENCY_BUCKET_MS = 0.5  # Width of one input-to-screen latency histogram bucket
+LATENCY_BUCKETS = 40  # Buckets up to 20 ms; slower samples share one overflow bucket
+LATENCY_TARGET_MS = 1000 / 144  # One frame at 144 Hz
+
+# Spectator wall
+WALL_BLOCK_SIZE = 6  # Block size of each tile's board
+WALL_TILE_GAP = 8  # Pixels between tiles
+WALL_FRAME_BUDGET_MS = 8  # Tile redraw time per frame; stale tiles past it wait for the next frame
+WALL_BOT_FRAMES_PER_ACTION = 6  # Each bot acts every this many frames, staggered across boards
+
+# Terminal front-end: curses color number for each block color (orange needs a 256-color terminal)
+CURSES_COLORS = {
+    CYAN: 'COLOR_CYAN',
+    BLUE: 'COLOR_BLUE',
+    ORANGE: 208,
+    YELLOW: 'COLOR_YELLOW',
+    GREEN: 'COLOR_GREEN',
+    MAGENTA: 'COLOR_MAGENTA',
+    RED: 'COLOR_RED'
+}
+
 # Tetromino shapes and rotations
 SHAPES = {
     'I': [
@@ -119,8 +165,33 @@ SHAPE_COLORS = {
     'Z': RED
 }
 
+SHAPE_NAMES = list(SHAPES.keys())
+
+# Lowest filled cell of each column for every rotation, as (col, row) offsets within the shape matrix
+SHAPE_BOTTOMS = {
+    name: [tuple((col, max(row for row in range(len(matrix)) if matrix[row][col]))
+                 for col in range(len(matrix[0])) if any(line[col] for line in matrix))
+           for matrix in rotations]
+    for name, rotations in SHAPES.items()
+}
+
+
+# Tetromino as a tuple, e.g. the 'piece' entry DirtyRects compares between frames
+PieceState = namedtuple('PieceState', ['shape_name', 'rotation', 'x', 'y'])
+
+
+# Player actions accepted by TetrisCore.step
+ACTION_LEFT = 0
+ACTION_RIGHT = 1
+ACTION_ROTATE = 2
+ACTION_SOFT_DROP = 3
+ACTION_HARD_DROP = 4
+ACTION_PAUSE = 5
+
 
 class Tetromino:
+    __slots__ = ('shape_name', 'rotation', 'shape_matrix', 'color', 'x', 'y')
+
     def __init__(self, shape=None):
         # Choose a random shape if none is provided
         if shape is None:
@@ -137,6 +208,20 @@ class Tetromino:
         self.x = GRID_WIDTH // 2 - len(self.shape_matrix[0]) // 2
         self.y = 0
 
+    @classmethod
+    def from_state(cls, state):
+        """Create a tetromino from a PieceState"""
+        tetromino = cls(state.shape_name)
+        tetromino.rotation = state.rotation
+        tetromino.shape_matrix = SHAPES[state.shape_name][state.rotation]
+        tetromino.x = state.x
+        tetromino.y = state.y
+        return tetromino
+
+    def get_state(self):
+        """Return the tetromino as an immutable PieceState"""
+        return PieceState(self.shape_name, self.rotation, self.x, self.y)
+
     def rotate(self, grid):
         """Rotate the tetromino clockwise if possible"""
         next_rotation = (self.rotation + 1) % len(SHAPES[self.shape_name])
@@ -164,10 +249,9 @@ class Tetromino:
             return True
         return False
 
-    def hard_drop(self, grid):
-        """Move the tetromino down until it collides"""
-        while self.move_down(grid):
-            pass
+    def hard_drop(self, distance):
+        """Move the tetromino down by its precomputed drop distance"""
+        self.y += distance
 
     def _check_collision(self, shape_matrix, x, y, grid):
         """Check if the tetromino would collide with the grid or boundaries"""
@@ -182,117 +266,108 @@ class Tetromino:
                         return True
         return False
 
-    def lock(self, grid):
-        """Lock the tetromino into the grid"""
+    def lock(self, grid, row_fill, column_heights):
+        """Lock the tetromino into the grid, update the row fill counts and column heights, return the rows touched"""
+        touched_rows = set()
         for row in range(len(self.shape_matrix)):
             for col in range(len(self.shape_matrix[row])):
                 if self.shape_matrix[row][col]:
                     if 0 <= self.y + row < GRID_HEIGHT and 0 <= self.x + col < GRID_WIDTH:
                         grid[self.y + row][self.x + col] = self.color
-        return grid
+                        row_fill[self.y + row] += 1
+                        touched_rows.add(self.y + row)
+                        column_heights[self.x + col] = max(column_heights[self.x + col], GRID_HEIGHT - self.y - row)
+        return touched_rows
 
 
-class TetrisGame:
-    def __init__(self):
-        # Initialize game window
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("Tetris")
-        self.clock = pygame.time.Clock()
+class TetrisCore:
+    """Game rules and state with no display, so games can be stepped headless"""
+
+    def __init__(self, seed=None):
+        # Seeded games replay identically
+        self.rng = random.Random(seed)
+        self.reset()
 
-        # Initialize game state
+    def reset(self):
+        """Reset the game state"""
         self.grid = [[None for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
-        self.current_piece = Tetromino()
-        self.next_piece = Tetromino()
+        self.row_fill = [0] * GRID_HEIGHT  # Number of filled cells in each row
+        self.column_heights = [0] * GRID_WIDTH  # Height of the highest filled cell in each column
+        self.current_piece = self._new_piece()
+        self.next_piece = self._new_piece()
         self.game_over = False
         self.paused = False
 
-        # Initialize scoring and level
+        # Scoring and level
         self.score = 0
         self.lines_cleared = 0
         self.level = 1
         self.fall_speed = INITIAL_FALL_SPEED
+        self.pieces_placed = 0
 
-        # Initialize timing
-        self.last_fall_time = time.time()
+        # Milliseconds of game time since the current piece last fell
+        self.fall_time = 0
 
-        # Initialize fonts
-        self.font = pygame.font.SysFont('Arial', 24)
-        self.big_font = pygame.font.SysFont('Arial', 36)
-
-    def run(self):
-        """Main game loop"""
-        running = True
+    def _new_piece(self):
+        """Create a random tetromino from the game's own generator"""
+        return Tetromino(self.rng.choice(SHAPE_NAMES))
 
-        while running:
-            # Handle events
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    running = False
-
-                if not self.game_over and not self.paused:
-                    if event.type == pygame.KEYDOWN:
-                        if event.key == pygame.K_LEFT:
-                            self.current_piece.move_left(self.grid)
-                        elif event.key == pygame.K_RIGHT:
-                            self.current_piece.move_right(self.grid)
-                        elif event.key == pygame.K_DOWN:
-                            self.current_piece.move_down(self.grid)
-                        elif event.key == pygame.K_UP:
-                            self.current_piece.rotate(self.grid)
-                        elif event.key == pygame.K_SPACE:
-                            self.current_piece.hard_drop(self.grid)
-                            self._lock_piece_and_get_new()
+    def step(self, action):
+        """Apply one player action (one of the ACTION_* constants)"""
+        if action == ACTION_PAUSE:
+            self.paused = not self.paused
+            return
+        if self.game_over or self.paused:
+            return
 
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_p:
-                        self.paused = not self.paused
-                    elif event.key == pygame.K_r and self.game_over:
-                        self._reset_game()
-
-            # Game logic (only if game is not over or paused)
-            if not self.game_over and not self.paused:
-                current_time = time.time()
-                if current_time - self.last_fall_time > 1.0 / self.fall_speed:
-                    # Try to move piece down
-                    if not self.current_piece.move_down(self.grid):
-                        self._lock_piece_and_get_new()
-                    self.last_fall_time = current_time
-
-            # Draw everything
-            self._draw()
-
-            # Cap the FPS
-            self.clock.tick(FPS)
+        piece = self.current_piece
+        if action == ACTION_LEFT:
+            piece.move_left(self.grid)
+        elif action == ACTION_RIGHT:
+            piece.move_right(self.grid)
+        elif action == ACTION_SOFT_DROP:
+            piece.move_down(self.grid)
+        elif action == ACTION_ROTATE:
+            piece.rotate(self.grid)
+        elif action == ACTION_HARD_DROP:
+            piece.hard_drop(self.drop_distance(piece))
+            self._lock_piece_and_get_new()
+
+    def advance(self, ms):
+        """Advance gravity by ms milliseconds of game time"""
+        if self.game_over or self.paused:
+            return
 
-        pygame.quit()
+        self.fall_time += ms
+        # Carry the remainder so any split of the same time gives the same number of falls
+        while not self.game_over and self.fall_time > 1000.0 / self.fall_speed:
+            self.fall_time -= 1000.0 / self.fall_speed
+            # Try to move piece down
+            if not self.current_piece.move_down(self.grid):
+                self._lock_piece_and_get_new()
 
     def _lock_piece_and_get_new(self):
         """Lock the current piece into the grid and get a new piece"""
         # Lock the current piece
-        self.grid = self.current_piece.lock(self.grid)
+        touched_rows = self.current_piece.lock(self.grid, self.row_fill, self.column_heights)
+        self.pieces_placed += 1
 
         # Check for completed lines
-        self._check_lines()
+        self._check_lines(touched_rows)
 
         # Get new pieces
         self.current_piece = self.next_piece
-        self.next_piece = Tetromino()
+        self.next_piece = self._new_piece()
 
         # Check if the new piece can be placed
-        for row in range(len(self.current_piece.shape_matrix)):
-            for col in range(len(self.current_piece.shape_matrix[row])):
-                if (self.current_piece.shape_matrix[row][col] and
-                        self.grid[self.current_piece.y + row][self.current_piece.x + col]):
-                    self.game_over = True
+        piece = self.current_piece
+        if piece._check_collision(piece.shape_matrix, piece.x, piece.y, self.grid):
+            self.game_over = True
 
-    def _check_lines(self):
-        """Check for completed lines and clear them"""
-        lines_to_clear = []
-
-        # Find lines to clear
-        for row in range(GRID_HEIGHT):
-            if all(self.grid[row]):
-                lines_to_clear.append(row)
+    def _check_lines(self, rows):
+        """Check the given rows for completed lines and clear them"""
+        # Only rows the last piece touched can have become full
+        lines_to_clear = [row for row in rows if self.row_fill[row] == GRID_WIDTH]
 
         if lines_to_clear:
             # Update score based on number of lines cleared
@@ -315,159 +390,1439 @@ class TetrisGame:
             if self.level > old_level:
                 self.fall_speed = INITIAL_FALL_SPEED + (self.level - 1) * LEVEL_SPEED_INCREASE
 
-            # Clear the lines
-            for row in lines_to_clear:
-                # Remove the line
-                self.grid.pop(row)
-                # Add a new empty line at the top
-                self.grid.insert(0, [None for _ in range(GRID_WIDTH)])
+            # Clear the lines in one compaction pass: kept rows slide down, empty rows refill the top
+            kept_rows = [row for row in range(GRID_HEIGHT) if self.row_fill[row] != GRID_WIDTH]
+            self.grid = ([[None for _ in range(GRID_WIDTH)] for _ in range(lines_count)] +
+                         [self.grid[row] for row in kept_rows])
+            self.row_fill = [0] * lines_count + [self.row_fill[row] for row in kept_rows]
+            self._update_column_heights()
+
+    def _update_column_heights(self):
+        """Recompute every column height from the grid (only needed after lines are cleared)"""
+        for col in range(GRID_WIDTH):
+            height = 0
+            for row in range(GRID_HEIGHT):
+                if self.grid[row][col]:
+                    height = GRID_HEIGHT - row
+                    break
+            self.column_heights[col] = height
+
+    def drop_distance(self, tetromino):
+        """Return how many rows the tetromino can fall; it lands at row tetromino.y + distance"""
+        distance = GRID_HEIGHT
+        for col, bottom in SHAPE_BOTTOMS[tetromino.shape_name][tetromino.rotation]:
+            top = GRID_HEIGHT - self.column_heights[tetromino.x + col]
+            if tetromino.y + bottom >= top:
+                # The piece is tucked under an overhang, so the skyline can't be used: search down
+                distance = 0
+                while not tetromino._check_collision(tetromino.shape_matrix, tetromino.x,
+                                                     tetromino.y + distance + 1, self.grid):
+                    distance += 1
+                return distance
+            distance = min(distance, top - (tetromino.y + bottom) - 1)
+        return distance
+
+
+class BatchTetrisCore:
+    """N games stepped together with NumPy: same rules as TetrisCore, one array expression per phase"""
+
+    # Points for clearing 0-4 lines at once, multiplied by the level
+    LINE_SCORES = (0, 100, 300, 500, 800)
+
+    # Filled cells kept left, right and below every board, so collision tests need no bounds checks
+    PADDING = 4
+
+    def __init__(self, n, seed=None):
+        if np is None:
+            raise ImportError("BatchTetrisCore requires numpy")
+        self.n = n
+        self.rng = np.random.default_rng(seed)
+        self.index = np.arange(n)
+
+        # Tables built from SHAPES: (row, col) of the 4 blocks of every shape and rotation.
+        # Shapes with fewer than 4 rotations repeat them so every lookup is a plain array index.
+        max_rotations = max(len(SHAPES[name]) for name in SHAPE_NAMES)
+        offsets = np.array([[[(row, col)
+                              for row in range(len(matrix)) for col in range(len(matrix[row])) if matrix[row][col]]
+                             for matrix in (SHAPES[name][r % len(SHAPES[name])] for r in range(max_rotations))]
+                            for name in SHAPE_NAMES])
+        self.rotation_counts = np.array([len(SHAPES[name]) for name in SHAPE_NAMES])
+        self.spawn_x = np.array([GRID_WIDTH // 2 - len(SHAPES[name][0][0]) // 2 for name in SHAPE_NAMES])
+        self.line_scores = np.array(self.LINE_SCORES)
+
+        # Boards and the active piece of every game. Cells hold shape index + 1 (0 is empty). boards is an
+        # (n, GRID_HEIGHT, GRID_WIDTH) view into the padded array, whose walls and floor hold a non-zero value.
+        pad = self.PADDING
+        self._padded = np.zeros((n, GRID_HEIGHT + pad, pad + GRID_WIDTH + pad), dtype=np.uint8)
+        self._padded[:, :, :pad] = self._padded[:, :, pad + GRID_WIDTH:] = self._padded[:, GRID_HEIGHT:] = 255
+        self.boards = self._padded[:, :GRID_HEIGHT, pad:pad + GRID_WIDTH]
+
+        # Cells are gathered by linear index into the flat padded array, which is much cheaper than
+        # 3-D fancy indexing: a piece at (x, y) of game g starts at origin[g] + y * row_stride + x
+        self._flat = self._padded.reshape(-1)
+        self.row_stride = self._padded.shape[2]
+        self.origin = self.index * self._padded.shape[1] * self.row_stride + pad
+        self.cell_offsets = offsets[..., 0] * self.row_stride + offsets[..., 1]
+        self.fall_steps = np.arange(1, GRID_HEIGHT + 1) * self.row_stride
+
+        self.kind = np.zeros(n, dtype=np.int64)
+        self.next_kind = np.zeros(n, dtype=np.int64)
+        self.rotation = np.zeros(n, dtype=np.int64)
+        self.x = np.zeros(n, dtype=np.int64)
+        self.y = np.zeros(n, dtype=np.int64)
+
+        # Scoring, level and gravity of every game
+        self.score = np.zeros(n, dtype=np.int64)
+        self.lines_cleared = np.zeros(n, dtype=np.int64)
+        self.level = np.ones(n, dtype=np.int64)
+        self.fall_speed = np.full(n, INITIAL_FALL_SPEED)
+        self.fall_time = np.zeros(n)
+        self.game_over = np.zeros(n, dtype=bool)
+
+        self.reset()
+
+    def reset(self, mask=None):
+        """Reset every game, or only the games selected by a boolean mask"""
+        idx = self.index if mask is None else self.index[mask]
+        self.boards[idx] = 0
+        self.kind[idx] = self.rng.integers(0, len(SHAPE_NAMES), len(idx))
+        self.next_kind[idx] = self.rng.integers(0, len(SHAPE_NAMES), len(idx))
+        self.rotation[idx] = 0
+        self.x[idx] = self.spawn_x[self.kind[idx]]
+        self.y[idx] = 0
+        self.score[idx] = 0
+        self.lines_cleared[idx] = 0
+        self.level[idx] = 1
+        self.fall_speed[idx] = INITIAL_FALL_SPEED
+        self.fall_time[idx] = 0
+        self.game_over[idx] = False
+
+    def _cells(self, idx, rotation, x, y):
+        """Linear indexes of the 4 blocks of the pieces of games idx at (rotation, x, y)"""
+        return (self.origin[idx] + y * self.row_stride + x)[:, None] + self.cell_offsets[self.kind[idx], rotation]
+
+    def _collides(self, idx, rotation, x, y):
+        """Check the games idx with their piece at (rotation, x, y) against walls, floor and blocks"""
+        return self._flat.take(self._cells(idx, rotation, x, y)).any(axis=1)
+
+    def drop_distance(self, idx=None):
+        """Return how many rows the pieces of games idx (default all) can fall"""
+        if idx is None:
+            idx = self.index
+        # Gather the column under every block; the first filled cell (at worst the floor) is where it stops.
+        # Cells past the floor are never reached by argmax, so clipping indexes at the array end is safe.
+        cells = self._cells(idx, self.rotation[idx], self.x[idx], self.y[idx])
+        below = self._flat.take(cells[:, :, None] + self.fall_steps, mode='clip')
+
+        # The piece stops as soon as any of its blocks does
+        return (below != 0).argmax(axis=2).min(axis=1)
+
+    def step(self, actions):
+        """Apply one ACTION_* per game; finished games ignore theirs"""
+        actions = np.asarray(actions)
+        live = ~self.game_over
+
+        # Moves and rotation: try the target position and keep it where nothing collides
+        x = self.x + (actions == ACTION_RIGHT) - (actions == ACTION_LEFT)
+        y = self.y + (actions == ACTION_SOFT_DROP)
+        rotation = np.where(actions == ACTION_ROTATE,
+                            (self.rotation + 1) % self.rotation_counts[self.kind], self.rotation)
+        moved = live & ~self._collides(self.index, rotation, x, y)
+        self.x = np.where(moved, x, self.x)
+        self.y = np.where(moved, y, self.y)
+        self.rotation = np.where(moved, rotation, self.rotation)
+
+        # Hard drops land and lock straight away
+        dropped = self.index[live & (actions == ACTION_HARD_DROP)]
+        if len(dropped):
+            self.y[dropped] += self.drop_distance(dropped)
+            self._lock(dropped)
+
+    def advance(self, ms):
+        """Advance gravity by ms milliseconds of game time in every running game"""
+        self.fall_time[~self.game_over] += ms
+        while True:
+            falling = self.index[~self.game_over & (self.fall_time > 1000.0 / self.fall_speed)]
+            if not len(falling):
+                return
+            self.fall_time[falling] -= 1000.0 / self.fall_speed[falling]
+            blocked = self._collides(falling, self.rotation[falling], self.x[falling], self.y[falling] + 1)
+            self.y[falling[~blocked]] += 1
+            if blocked.any():
+                self._lock(falling[blocked])
+
+    def _lock(self, idx):
+        """Lock the pieces of games idx, clear their full lines and spawn their next pieces"""
+        # Write the pieces into the boards (pieces start at row 0 and only move down, so every block is visible)
+        cells = self._cells(idx, self.rotation[idx], self.x[idx], self.y[idx])
+        self._flat[cells] = np.broadcast_to((self.kind[idx] + 1)[:, None], cells.shape)
+
+        # Clear full lines: a stable sort moves full rows to the top, then they are emptied
+        boards = self.boards[idx]
+        full = (boards != 0).all(axis=2)
+        cleared = full.sum(axis=1)
+        if cleared.any():
+            order = np.argsort(np.where(full, -1, np.arange(GRID_HEIGHT)), axis=1, kind='stable')
+            boards = np.take_along_axis(boards, order[:, :, None], axis=1)
+            boards[np.arange(GRID_HEIGHT)[None, :] < cleared[:, None]] = 0
+            self.boards[idx] = boards
+
+            self.score[idx] += self.line_scores[cleared] * self.level[idx]
+            self.lines_cleared[idx] += cleared
+            self.level[idx] = self.lines_cleared[idx] // LINES_PER_LEVEL + 1
+            self.fall_speed[idx] = INITIAL_FALL_SPEED + (self.level[idx] - 1) * LEVEL_SPEED_INCREASE
+
+        # Spawn the next pieces; a game is over when its new piece doesn't fit
+        self.kind[idx] = self.next_kind[idx]
+        self.next_kind[idx] = self.rng.integers(0, len(SHAPE_NAMES), len(idx))
+        self.rotation[idx] = 0
+        self.x[idx] = self.spawn_x[self.kind[idx]]
+        self.y[idx] = 0
+        self.game_over[idx] = self._collides(idx, self.rotation[idx], self.x[idx], self.y[idx])
+
+
+class DirtyRects:
+    """Remembers what each screen region showed last frame and sends only the changed ones to the display"""
+
+    def __init__(self):
+        self.shown = {}  # Region key -> (rect, value) last sent to the display
+        self.rects = []
+        self.full = True  # Send the whole window on the next update
+
+    def mark(self, key, rect, value):
+        """Record a region for this frame, queueing its old and new rect if its value changed"""
+        old = self.shown.get(key)
+        if old is not None and old[1] == value:
+            return
+        self.shown[key] = (rect, value)
+        self.rects.append(rect)
+        if old is not None and old[0] != rect:
+            self.rects.append(old[0])
+
+    def invalidate(self):
+        """Send the whole window on the next update"""
+        self.full = True
+
+    def update(self):
+        """Send the queued regions to the display"""
+        if self.full:
+            pygame.display.flip()
+            self.full = False
+        elif self.rects:
+            pygame.display.update(self.rects)
+        self.rects.clear()
+
+
+class RealClock:
+    """Wall-clock time for TetrisGame: tick sleeps to hold the tick rate"""
+
+    def __init__(self):
+        self.clock = pygame.time.Clock()
+
+    def now(self):
+        """Milliseconds since pygame.init"""
+        return pygame.time.get_ticks()
+
+    def tick(self, fps):
+        """Wait for the next tick and return the milliseconds since the last one"""
+        return self.clock.tick(fps)
+
+
+class VirtualClock:
+    """Simulated time for TetrisGame: tick never sleeps, so minutes of play run in milliseconds"""
+
+    def __init__(self, frame_ms=1000.0 / FPS):
+        # Every tick is frame_ms long, whatever tick rate run() asks for: one frame by default rather
+        # than one 1 ms logic tick. TetrisCore.advance and AutoRepeat.due catch up by elapsed time, so
+        # larger steps give the same gravity, level progression and key repeats with fewer ticks
+        self.frame_ms = frame_ms
+        self.time = 0.0
+
+    def now(self):
+        """Milliseconds of simulated time"""
+        return self.time
+
+    def tick(self, fps):
+        """Step simulated time by frame_ms (fps is ignored) and return the step"""
+        self.time += self.frame_ms
+        return self.frame_ms
+
+
+class AutoRepeat:
+    """Delayed auto-shift and auto-repeat for held keys, timed in clock milliseconds"""
+
+    def __init__(self, das_ms=DAS_MS, arr_ms=ARR_MS):
+        self.das_ms = das_ms
+        self.arr_ms = arr_ms
+        self.next_repeat = {}  # Held action -> clock time of its next repeat
+
+    def press(self, action, now):
+        """Start the repeat timer of a key pressed at now (the press itself is applied by the caller)"""
+        if action == ACTION_SOFT_DROP:
+            self.next_repeat[action] = now + SOFT_DROP_REPEAT_MS
+        elif action in (ACTION_LEFT, ACTION_RIGHT):
+            # The newest direction wins while both are held
+            self.next_repeat.pop(ACTION_RIGHT if action == ACTION_LEFT else ACTION_LEFT, None)
+            self.next_repeat[action] = now + self.das_ms
+
+    def release(self, action):
+        """Stop repeating a released key"""
+        self.next_repeat.pop(action, None)
+
+    def clear(self):
+        """Forget every held key (the window lost focus, so their releases will not arrive)"""
+        self.next_repeat.clear()
+
+    def due(self, now):
+        """Return the repeats that fell due by now in time order, catching up after a long tick"""
+        repeats = []
+        for action, when in self.next_repeat.items():
+            interval = SOFT_DROP_REPEAT_MS if action == ACTION_SOFT_DROP else self.arr_ms
+            while when <= now:
+                repeats.append((when, action))
+                when += interval
+            self.next_repeat[action] = when
+        repeats.sort()
+        return [action for _, action in repeats]
+
+
+class LatencyHistogram:
+    """Input-to-screen latency samples counted in LATENCY_BUCKET_MS buckets"""
+
+    def __init__(self, bucket_ms=LATENCY_BUCKET_MS, buckets=LATENCY_BUCKETS):
+        self.bucket_ms = bucket_ms
+        self.counts = [0] * (buckets + 1)  # The last bucket holds everything slower
+        self.total = 0
+        self.worst = 0.0
+
+    def add(self, ms):
+        """Count one sample"""
+        self.counts[min(int(ms / self.bucket_ms), len(self.counts) - 1)] += 1
+        self.total += 1
+        self.worst = max(self.worst, ms)
+
+    def percentile(self, p):
+        """Return the upper edge of the bucket holding the p-th percentile, capped at the worst sample"""
+        rank = max(1, math.ceil(self.total * p / 100))
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min((bucket + 1) * self.bucket_ms, self.worst)
+        return 0.0
+
+    def report(self):
+        """Return a text summary: percentiles, the share under LATENCY_TARGET_MS and a bar per bucket"""
+        if not self.total:
+            return "No input latency samples"
+        under = sum(count for bucket, count in enumerate(self.counts[:-1])
+                    if (bucket + 1) * self.bucket_ms <= LATENCY_TARGET_MS)
+        lines = [f"Input-to-screen latency, {self.total} inputs: p50 {self.percentile(50):.1f} ms, "
+                 f"p99 {self.percentile(99):.1f} ms, max {self.worst:.1f} ms, "
+                 f"{under / self.total:.1%} under {LATENCY_TARGET_MS:.1f} ms"]
+        peak = max(self.counts)
+        for bucket, count in enumerate(self.counts):
+            if count:
+                low = bucket * self.bucket_ms
+                label = f">{low:5.1f}" if bucket == len(self.counts) - 1 else f"{low:5.1f}-{low + self.bucket_ms:4.1f}"
+                lines.append(f"{label} ms {count:7d} {'#' * max(1, round(count * 40 / peak))}")
+        return "\n".join(lines)
+
+
+class TetrisGame:
+    """Pygame window that draws a TetrisCore and feeds it keyboard input"""
+
+    # Overlay text as (text, font, vertical offset from the screen center); {score} is the core's score
+    GAME_OVER_LINES = (("GAME OVER", "big", -50), ("Score: {score}", "small", 0), ("Press R to restart", "small", 40))
+    PAUSED_LINES = (("PAUSED", "big", 0),)
+
+    def __init__(self, core=None, clock=None, das_ms=DAS_MS, arr_ms=ARR_MS):
+        # Initialize pygame and the game window
+        pygame.init()
+        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        pygame.display.set_caption("Tetris")
+        # Anything with now() and tick(fps) in milliseconds: RealClock, or VirtualClock for simulated runs
+        self.clock = clock if clock is not None else RealClock()
+
+        # Held keys repeat on the logic tick; every key press is timed until its frame is on screen
+        self.auto_repeat = AutoRepeat(das_ms, arr_ms)
+        self.latency = LatencyHistogram()
+
+        # Game state lives in the core
+        self.core = core if core is not None else TetrisCore()
+        self.key_actions = {
+            pygame.K_LEFT: ACTION_LEFT,
+            pygame.K_RIGHT: ACTION_RIGHT,
+            pygame.K_DOWN: ACTION_SOFT_DROP,
+            pygame.K_UP: ACTION_ROTATE,
+            pygame.K_SPACE: ACTION_HARD_DROP,
+            pygame.K_p: ACTION_PAUSE
+        }
+
+        # Initialize fonts
+        self.font = pygame.font.SysFont('Arial', 24)
+        self.big_font = pygame.font.SysFont('Arial', 36)
+
+        # Pre-rendered bordered block per color, filled in on first use
+        self.block_sprites = {}
+
+        # Static layer (grid lines and sidebar labels), rendered on first use
+        self.background = None
+
+        # Screen regions drawn last frame; only the changed ones are sent to the display
+        self.dirty = DirtyRects()
+
+        # Pause and game-over overlays: state -> (score shown or None, blit list), rebuilt when that score changes
+        self.overlays = {}
+        self.overlay_dim = None
+        self.presented_overlay = None
+
+    def run(self, duration_ms=None):
+        """Main game loop, stopped early after duration_ms of clock time if given"""
+        # Input is read every logic tick (LOGIC_HZ) rather than once per frame; a frame is drawn
+        # on the tick of any input and otherwise FPS times a second
+        running = True
+        elapsed = 0
+        start = self.clock.now()
+        next_frame = start
+
+        while running and (duration_ms is None or self.clock.now() - start <= duration_ms):
+            now = self.clock.now()
+            pressed = []  # perf_counter time each key press was read this tick
+
+            # Handle events
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+
+                if event.type == pygame.KEYDOWN:
+                    if event.key in self.key_actions:
+                        pressed.append(time.perf_counter())
+                        self.core.step(self.key_actions[event.key])
+                        self.auto_repeat.press(self.key_actions[event.key], now)
+                    elif event.key == pygame.K_r and self.core.game_over:
+                        pressed.append(time.perf_counter())
+                        self.core.reset()
+                elif event.type == pygame.KEYUP and event.key in self.key_actions:
+                    self.auto_repeat.release(self.key_actions[event.key])
+                elif event.type == pygame.WINDOWFOCUSLOST:
+                    self.auto_repeat.clear()
+                elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                    # The window was uncovered: the grid lines and labels only reach it with a full update
+                    self.dirty.invalidate()
+                    # A pause or game-over frame must be drawn again too, or _draw keeps skipping it
+                    self.presented_overlay = None
+
+            # Held keys repeat on the logic tick, after the delayed auto-shift
+            repeats = self.auto_repeat.due(now)
+            for action in repeats:
+                self.core.step(action)
+
+            # Game logic: apply gravity for the time since the last tick
+            self.core.advance(elapsed)
+
+            # Draw on input at once, and on the frame clock for gravity
+            if pressed or repeats or now >= next_frame:
+                # Only a presented frame shows the input; a key behind an unchanged overlay is not a sample
+                if self._draw():
+                    shown = time.perf_counter()
+                    for stamp in pressed:
+                        self.latency.add((shown - stamp) * 1000)
+                # A stall skips the frames it missed rather than drawing them back to back
+                next_frame = max(next_frame + 1000 / FPS, now)
+
+            # Wait for the next logic tick
+            elapsed = self.clock.tick(LOGIC_HZ)
+
+        pygame.quit()
 
     def _draw(self):
-        """Draw the game"""
-        # Clear the screen
-        self.screen.fill(BLACK)
+        """Draw the game and return True, or return False if the presented frame is still current"""
+        # The core is frozen behind an overlay, so once that frame is presented the screen is current
+        overlay = self._overlay()
+        if overlay is not None and overlay is self.presented_overlay:
+            return False
+
+        # Clear the screen with the static layer (grid lines and sidebar labels)
+        self.screen.blit(self._background(), (0, 0))
+
+        # Blocks are queued here and drawn together with one Surface.blits call
+        blocks = []
 
         # Draw the grid
-        self._draw_grid()
+        self._draw_grid(blocks)
+
+        # Draw the landing preview under the current piece (it never overlaps locked blocks)
+        piece = self.core.current_piece
+        ghost_rect = self._draw_ghost(piece)
+        self.dirty.mark('ghost', ghost_rect, (piece.get_state(), ghost_rect.topleft))
 
         # Draw the current piece
-        self._draw_tetromino(self.current_piece)
+        self.dirty.mark('piece', self._draw_tetromino(blocks, piece), piece.get_state())
 
         # Draw sidebar
-        self._draw_sidebar()
+        self._draw_sidebar(blocks)
 
-        # Draw overlay messages
-        if self.game_over:
-            self._draw_game_over()
-        elif self.paused:
-            self._draw_paused()
+        self.screen.blits(blocks, doreturn=False)
 
-        # Update the display
-        pygame.display.flip()
-
-    def _draw_grid(self):
-        """Draw the game grid"""
-        # Draw grid background
-        grid_rect = pygame.Rect(0, 0, GRID_WIDTH * BLOCK_SIZE, GRID_HEIGHT * BLOCK_SIZE)
-        pygame.draw.rect(self.screen, BLACK, grid_rect)
+        # Draw overlay messages
+        if overlay is not None:
+            self.screen.blits(overlay, doreturn=False)
+        self.dirty.mark('overlay', self.screen.get_rect() if overlay else pygame.Rect(0, 0, 0, 0),
+                        (self.core.game_over, self.core.paused))
+
+        # Update the changed parts of the display
+        self.dirty.update()
+        self.presented_overlay = overlay
+        return True
+
+    def _background(self):
+        """Return the static layer, rendering it again only when the window size changes"""
+        size = self.screen.get_size()
+        if self.background is None or self.background.get_size() != size:
+            self.background = self._render_background(size)
+            self.dirty.invalidate()
+        return self.background
+
+    def _render_background(self, size):
+        """Render everything that does not change between frames onto a new Surface"""
+        background = pygame.Surface(size).convert()
+        background.fill(BLACK)
 
         # Draw grid lines
         for x in range(0, GRID_WIDTH * BLOCK_SIZE + 1, BLOCK_SIZE):
-            pygame.draw.line(self.screen, GRAY, (x, 0), (x, GRID_HEIGHT * BLOCK_SIZE), GRID_LINE_WIDTH)
+            pygame.draw.line(background, GRAY, (x, 0), (x, GRID_HEIGHT * BLOCK_SIZE), GRID_LINE_WIDTH)
         for y in range(0, GRID_HEIGHT * BLOCK_SIZE + 1, BLOCK_SIZE):
-            pygame.draw.line(self.screen, GRAY, (0, y), (GRID_WIDTH * BLOCK_SIZE, y), GRID_LINE_WIDTH)
+            pygame.draw.line(background, GRAY, (0, y), (GRID_WIDTH * BLOCK_SIZE, y), GRID_LINE_WIDTH)
+
+        # Draw the sidebar labels
+        next_text = self.font.render("Next:", True, WHITE)
+        background.blit(next_text, (SIDEBAR_X, 20))
 
-        # Draw locked blocks
+        controls_y = 300
+        controls_text = [
+            "Controls:",
+            "←/→: Move",
+            "↑: Rotate",
+            "↓: Soft drop",
+            "Space: Hard drop",
+            "P: Pause"
+        ]
+
+        for i, text in enumerate(controls_text):
+            ctrl_text = self.font.render(text, True, WHITE)
+            background.blit(ctrl_text, (SIDEBAR_X, controls_y + i * 30))
+        return background
+
+    def _draw_grid(self, blocks):
+        """Queue the locked blocks (the grid lines are part of the background)"""
+        grid = self.core.grid
         for row in range(GRID_HEIGHT):
+            self.dirty.mark(('row', row), pygame.Rect(0, row * BLOCK_SIZE, GRID_WIDTH * BLOCK_SIZE, BLOCK_SIZE),
+                            tuple(grid[row]))
             for col in range(GRID_WIDTH):
-                if self.grid[row][col]:
-                    self._draw_block(col, row, self.grid[row][col])
+                if grid[row][col]:
+                    self._draw_block(blocks, col, row, grid[row][col])
 
-    def _draw_tetromino(self, tetromino):
-        """Draw a tetromino"""
+    def _draw_tetromino(self, blocks, tetromino):
+        """Queue the blocks of a tetromino and return the rect they cover"""
+        covered = pygame.Rect(0, 0, 0, 0)
         for row in range(len(tetromino.shape_matrix)):
             for col in range(len(tetromino.shape_matrix[row])):
                 if tetromino.shape_matrix[row][col]:
-                    self._draw_block(tetromino.x + col, tetromino.y + row, tetromino.color)
-
-    def _draw_block(self, x, y, color):
-        """Draw a single block at grid coordinates (x, y)"""
+                    self._draw_block(blocks, tetromino.x + col, tetromino.y + row, tetromino.color)
+                    if tetromino.y + row >= 0:
+                        rect = pygame.Rect((tetromino.x + col) * BLOCK_SIZE, (tetromino.y + row) * BLOCK_SIZE,
+                                           BLOCK_SIZE, BLOCK_SIZE)
+                        covered = covered.union(rect) if covered else rect
+        return covered
+
+    def _draw_ghost(self, tetromino):
+        """Draw the outline of where the tetromino would land and return the rect it covers"""
+        covered = pygame.Rect(0, 0, 0, 0)
+        ghost_y = tetromino.y + self.core.drop_distance(tetromino)
+        for row in range(len(tetromino.shape_matrix)):
+            for col in range(len(tetromino.shape_matrix[row])):
+                if tetromino.shape_matrix[row][col] and ghost_y + row >= 0:
+                    rect = pygame.Rect((tetromino.x + col) * BLOCK_SIZE, (ghost_y + row) * BLOCK_SIZE,
+                                       BLOCK_SIZE, BLOCK_SIZE)
+                    pygame.draw.rect(self.screen, tetromino.color, rect, 1)
+                    covered = covered.union(rect) if covered else rect
+        return covered
+
+    def _block_sprite(self, color):
+        """Return the cached bordered block Surface for a color"""
+        sprite = self.block_sprites.get(color)
+        if sprite is None:
+            sprite = pygame.Surface((BLOCK_SIZE, BLOCK_SIZE)).convert()
+            sprite.fill(color)
+            pygame.draw.rect(sprite, WHITE, sprite.get_rect(), 1)  # Block border
+            self.block_sprites[color] = sprite
+        return sprite
+
+    def _draw_block(self, blocks, x, y, color):
+        """Queue a single block at grid coordinates (x, y)"""
         # Skip if block is outside the visible grid
         if y < 0:
             return
 
-        rect = pygame.Rect(x * BLOCK_SIZE, y * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE)
-        pygame.draw.rect(self.screen, color, rect)
-        pygame.draw.rect(self.screen, WHITE, rect, 1)  # Block border
-
-    def _draw_sidebar(self):
-        """Draw the sidebar with score, level, and next piece"""
-        # Draw next piece preview
-        next_text = self.font.render("Next:", True, WHITE)
-        self.screen.blit(next_text, (SIDEBAR_X, 20))
+        blocks.append((self._block_sprite(color), (x * BLOCK_SIZE, y * BLOCK_SIZE)))
 
+    def _draw_sidebar(self, blocks):
+        """Draw the sidebar with score, level, and next piece (preview blocks are queued)"""
         # Calculate position for next piece preview
         preview_x = SIDEBAR_X + 30
         preview_y = 60
 
         # Create a centered preview of the next piece
-        for row in range(len(self.next_piece.shape_matrix)):
-            for col in range(len(self.next_piece.shape_matrix[row])):
-                if self.next_piece.shape_matrix[row][col]:
-                    preview_rect = pygame.Rect(
-                        preview_x + col * BLOCK_SIZE,
-                        preview_y + row * BLOCK_SIZE,
-                        BLOCK_SIZE, BLOCK_SIZE
-                    )
-                    pygame.draw.rect(self.screen, self.next_piece.color, preview_rect)
-                    pygame.draw.rect(self.screen, WHITE, preview_rect, 1)
+        next_piece = self.core.next_piece
+        preview_rect = pygame.Rect(preview_x, preview_y, len(next_piece.shape_matrix[0]) * BLOCK_SIZE,
+                                   len(next_piece.shape_matrix) * BLOCK_SIZE)
+        self.dirty.mark('next', preview_rect, next_piece.shape_name)
+        for row in range(len(next_piece.shape_matrix)):
+            for col in range(len(next_piece.shape_matrix[row])):
+                if next_piece.shape_matrix[row][col]:
+                    blocks.append((self._block_sprite(next_piece.color),
+                                   (preview_x + col * BLOCK_SIZE, preview_y + row * BLOCK_SIZE)))
 
         # Draw score
-        score_text = self.font.render(f"Score: {self.score}", True, WHITE)
-        self.screen.blit(score_text, (SIDEBAR_X, 160))
+        score_text = self.font.render(f"Score: {self.core.score}", True, WHITE)
+        self.dirty.mark('score', self.screen.blit(score_text, (SIDEBAR_X, 160)), self.core.score)
 
         # Draw level
-        level_text = self.font.render(f"Level: {self.level}", True, WHITE)
-        self.screen.blit(level_text, (SIDEBAR_X, 200))
+        level_text = self.font.render(f"Level: {self.core.level}", True, WHITE)
+        self.dirty.mark('level', self.screen.blit(level_text, (SIDEBAR_X, 200)), self.core.level)
 
         # Draw lines cleared
-        lines_text = self.font.render(f"Lines: {self.lines_cleared}", True, WHITE)
-        self.screen.blit(lines_text, (SIDEBAR_X, 240))
-
-        # Draw controls hint
-        controls_y = 300
-        controls_text = [
-            "Controls:",
-            "←/→: Move",
-            "↑: Rotate",
-            "↓: Soft drop",
-            "Space: Hard drop",
-            "P: Pause"
-        ]
-
-        for i, text in enumerate(controls_text):
-            ctrl_text = self.font.render(text, True, WHITE)
-            self.screen.blit(ctrl_text, (SIDEBAR_X, controls_y + i * 30))
-
-    def _draw_game_over(self):
-        """Draw game over message"""
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 128))
-        self.screen.blit(overlay, (0, 0))
-
-        game_over_text = self.big_font.render("GAME OVER", True, WHITE)
-        restart_text = self.font.render("Press R to restart", True, WHITE)
+        lines_text = self.font.render(f"Lines: {self.core.lines_cleared}", True, WHITE)
+        self.dirty.mark('lines', self.screen.blit(lines_text, (SIDEBAR_X, 240)), self.core.lines_cleared)
+
+    def _overlay(self):
+        """Return the blit list of the game-over or pause overlay, or None while playing"""
+        if self.core.game_over:
+            return self._cached_overlay('game_over', self.GAME_OVER_LINES, self.core.score)
+        if self.core.paused:
+            return self._cached_overlay('paused', self.PAUSED_LINES, None)
+        return None
+
+    def _cached_overlay(self, state, lines, score):
+        """Return the overlay for a state, building it again only if the score shown in its text changed"""
+        cached = self.overlays.get(state)
+        if cached is not None and cached[0] == score:
+            return cached[1]
+
+        # The translucent dimming layer is shared by every overlay
+        if self.overlay_dim is None:
+            self.overlay_dim = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+            self.overlay_dim.fill((0, 0, 0, 128))
+
+        blits = [(self.overlay_dim, (0, 0))]
+        for text, font, offset in lines:
+            label = (self.big_font if font == "big" else self.font).render(text.format(score=score), True, WHITE)
+            blits.append((label, label.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + offset))))
+        self.overlays[state] = (score, blits)
+        return blits
+
+
+class SpectatorWall:
+    """Window that tiles many live TetrisCore boards and redraws only the tiles whose game changed"""
+
+    def __init__(self, cores, block_size=WALL_BLOCK_SIZE, budget_ms=WALL_FRAME_BUDGET_MS):
+        pygame.init()
+        self.cores = cores
+        self.block_size = block_size
+        self.budget = budget_ms / 1000.0
+
+        # One font for every tile label
+        self.font = pygame.font.SysFont('Arial', 12)
+        self.label_height = self.font.get_linesize()
+
+        # Lay the tiles out in a roughly square window
+        self.board_size = (GRID_WIDTH * block_size, GRID_HEIGHT * block_size)
+        self.tile_size = (self.board_size[0] + WALL_TILE_GAP, self.board_size[1] + self.label_height + WALL_TILE_GAP)
+        self.columns = max(1, math.ceil(math.sqrt(len(cores) * self.tile_size[1] / self.tile_size[0])))
+        rows = math.ceil(len(cores) / self.columns)
+        self.screen = pygame.display.set_mode((self.columns * self.tile_size[0], rows * self.tile_size[1]))
+        pygame.display.set_caption(f"Tetris - {len(cores)} boards")
+
+        # Shared sprite atlas (one bordered block per color) and empty board image
+        self.atlas, self.atlas_areas = self._build_atlas()
+        self.board_background = pygame.Surface(self.board_size).convert()
+        self.board_background.fill(BLACK)
+        pygame.draw.rect(self.board_background, GRAY, self.board_background.get_rect(), 1)
+
+        # Game state each tile showed when it was last drawn, and the tile the next frame starts at
+        self.drawn = [None] * len(cores)
+        self.cursor = 0
+        self.full = False  # Send the whole window on the next draw
+        self.screen.fill(BLACK)
+        pygame.display.flip()
 
-        text_rect = game_over_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 30))
-        restart_rect = restart_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 30))
+    def _build_atlas(self):
+        """Render every block color side by side into one Surface and return it with each color's area"""
+        size = self.block_size
+        colors = list(SHAPE_COLORS.values())
+        atlas = pygame.Surface((size * len(colors), size)).convert()
+        areas = {}
+        for i, color in enumerate(colors):
+            area = pygame.Rect(i * size, 0, size, size)
+            atlas.fill(color, area)
+            pygame.draw.rect(atlas, WHITE, area, 1)  # Block border
+            areas[color] = area
+        return atlas, areas
+
+    def _tile_state(self, index):
+        """Return a value that changes whenever tile index needs drawing again"""
+        core = self.cores[index]
+        return core.pieces_placed, core.current_piece.get_state(), core.game_over
+
+    def _draw_tile(self, index):
+        """Draw one board and its label into its tile and return the tile rect"""
+        core = self.cores[index]
+        x = index % self.columns * self.tile_size[0] + WALL_TILE_GAP // 2
+        y = index // self.columns * self.tile_size[1] + WALL_TILE_GAP // 2
+        size = self.block_size
+        self.screen.blit(self.board_background, (x, y))
+
+        # Locked blocks and the falling piece, all cut from the shared atlas
+        blocks = []
+        for row, cells in enumerate(core.grid):
+            for col, color in enumerate(cells):
+                if color:
+                    blocks.append((self.atlas, (x + col * size, y + row * size), self.atlas_areas[color]))
+        piece = core.current_piece
+        for row, cells in enumerate(piece.shape_matrix):
+            for col, filled in enumerate(cells):
+                if filled and piece.y + row >= 0:
+                    blocks.append((self.atlas, (x + (piece.x + col) * size, y + (piece.y + row) * size),
+                                   self.atlas_areas[piece.color]))
+        self.screen.blits(blocks, doreturn=False)
+
+        # Label under the board
+        label_rect = pygame.Rect(x, y + self.board_size[1], self.board_size[0], self.label_height)
+        self.screen.fill(BLACK, label_rect)
+        label = self.font.render(f"{index + 1}: {core.score}", True, RED if core.game_over else WHITE)
+        self.screen.blit(label, label_rect)
+        return pygame.Rect(x, y, self.board_size[0], self.board_size[1] + self.label_height)
+
+    def invalidate(self):
+        """Mark every tile stale and send the whole window on the next draw (after it was uncovered)"""
+        self.drawn = [None] * len(self.cores)
+        self.full = True
+
+    def draw(self):
+        """Redraw the tiles whose game changed, within the frame budget, and return how many were drawn"""
+        start = time.perf_counter()
+        rects = []
+        count = len(self.cores)
+        for offset in range(count):
+            index = (self.cursor + offset) % count
+            state = self._tile_state(index)
+            if state == self.drawn[index]:
+                continue
+            rects.append(self._draw_tile(index))
+            self.drawn[index] = state
+            if time.perf_counter() - start > self.budget:
+                # Out of time: the next frame starts with the tiles left over
+                self.cursor = (index + 1) % count
+                break
+        if self.full:
+            pygame.display.flip()
+            self.full = False
+        elif rects:
+            pygame.display.update(rects)
+        return len(rects)
+
+
+class CursesView:
+    """Terminal front-end for a TetrisCore that only writes the screen cells changed since the last frame"""
+
+    SIDEBAR_X = GRID_WIDTH * 2 + 4
+
+    def __init__(self, stdscr, core):
+        self.stdscr = stdscr
+        self.core = core
+        stdscr.nodelay(True)
+        stdscr.keypad(True)
+        try:
+            curses.curs_set(0)
+        except curses.error:  # Terminal cannot hide the cursor
+            pass
 
-        self.screen.blit(game_over_text, text_rect)
-        self.screen.blit(restart_text, restart_rect)
+        self.block_attrs = self._init_colors()
+        self.key_actions = {
+            curses.KEY_LEFT: ACTION_LEFT,
+            curses.KEY_RIGHT: ACTION_RIGHT,
+            curses.KEY_DOWN: ACTION_SOFT_DROP,
+            curses.KEY_UP: ACTION_ROTATE,
+            ord(' '): ACTION_HARD_DROP,
+            ord('p'): ACTION_PAUSE
+        }
+
+        # (row, col) -> (text, attr) of everything written so far
+        self.shown = {}
+
+    def _init_colors(self):
+        """Return the attribute that draws a block of each color, as solid background where possible"""
+        if not curses.has_colors():
+            return {color: curses.A_REVERSE for color in CURSES_COLORS}
+        curses.start_color()
+        attrs = {}
+        for pair, (color, name) in enumerate(CURSES_COLORS.items(), start=1):
+            number = getattr(curses, name) if isinstance(name, str) else name
+            if number >= curses.COLORS:
+                number = curses.COLOR_RED  # Closest basic color to orange
+            curses.init_pair(pair, curses.COLOR_BLACK, number)
+            attrs[color] = curses.color_pair(pair)
+        return attrs
+
+    def read_actions(self):
+        """Return the actions of every pending key press plus 'reset' and 'quit' requests"""
+        actions = []
+        while True:
+            key = self.stdscr.getch()
+            if key == -1:
+                return actions
+            if key in self.key_actions:
+                actions.append(self.key_actions[key])
+            elif key in (ord('r'), ord('R')):
+                actions.append('reset')
+            elif key in (ord('q'), ord('Q')):
+                actions.append('quit')
+
+    def _frame(self):
+        """Return the whole desired screen as {(row, col): (text, attr)}"""
+        frame = {}
+        core = self.core
+
+        def text(row, col, string, attr=curses.A_NORMAL):
+            frame[(row, col)] = (string, attr)
+
+        # Board with its border; each cell is two characters wide
+        for row in range(1, GRID_HEIGHT + 1):
+            text(row, 0, '|')
+            text(row, GRID_WIDTH * 2 + 1, '|')
+        text(0, 0, '+' + '-' * GRID_WIDTH * 2 + '+')
+        text(GRID_HEIGHT + 1, 0, '+' + '-' * GRID_WIDTH * 2 + '+')
+        cells = {}
+        for row in range(GRID_HEIGHT):
+            for col in range(GRID_WIDTH):
+                cells[(row, col)] = core.grid[row][col]
+        piece = core.current_piece
+        for row, line in enumerate(piece.shape_matrix):
+            for col, filled in enumerate(line):
+                if filled and 0 <= piece.y + row < GRID_HEIGHT:
+                    cells[(piece.y + row, piece.x + col)] = piece.color
+        for (row, col), color in cells.items():
+            if color:
+                text(row + 1, col * 2 + 1, '[]', self.block_attrs[color])
+            else:
+                text(row + 1, col * 2 + 1, ' .')
+
+        # Sidebar: next piece, score and status
+        x = self.SIDEBAR_X
+        text(1, x, 'Next:')
+        next_piece = core.next_piece
+        for row in range(4):
+            for col in range(4):
+                filled = (row < len(next_piece.shape_matrix) and col < len(next_piece.shape_matrix[row])
+                          and next_piece.shape_matrix[row][col])
+                text(row + 2, x + col * 2, '[]' if filled else '  ',
+                     self.block_attrs[next_piece.color] if filled else curses.A_NORMAL)
+        text(7, x, f"Score: {core.score:<10}")
+        text(8, x, f"Level: {core.level:<10}")
+        text(9, x, f"Lines: {core.lines_cleared:<10}")
+        status = 'GAME OVER - r restarts' if core.game_over else 'PAUSED' if core.paused else ''
+        text(11, x, f"{status:<22}", curses.A_BOLD)
+        text(13, x, 'Arrows move/rotate')
+        text(14, x, 'Space drop, p pause')
+        text(15, x, 'q quits')
+        return frame
+
+    def draw(self):
+        """Write the cells that differ from the last frame and return how many were written"""
+        frame = self._frame()
+        written = 0
+        for position, cell in frame.items():
+            if self.shown.get(position) != cell:
+                try:
+                    self.stdscr.addstr(position[0], position[1], cell[0], cell[1])
+                except curses.error:  # Off the edge of a small terminal
+                    pass
+                written += 1
+        self.shown = frame
+        if written:
+            self.stdscr.refresh()
+        return written
+
+
+class AsyncSession:
+    """Headless TetrisCore hosted on a shared asyncio loop: gravity, input and rendering are each a task"""
+
+    # Board cell characters: the shape letter of each block color
+    CELL_CHARS = {color: name for name, color in SHAPE_COLORS.items()}
+
+    def __init__(self, core, tick_rate=FPS, send=None):
+        self.core = core
+        self.tick_rate = tick_rate
+        self.send = send  # Coroutine function given each frame as bytes; None renders without sending
+        self.actions = asyncio.Queue()  # ACTION_* constants, 'reset' or 'quit' from the client
+        self.changed = asyncio.Event()
+
+        # Load statistics
+        self.ticks = 0
+        self.late_ticks = 0  # Ticks that ran more than one tick interval behind schedule
+        self.frames = 0
+
+    async def run(self, duration=None):
+        """Play until a 'quit' action, or for duration seconds if given"""
+        tasks = [asyncio.create_task(self._gravity()), asyncio.create_task(self._render())]
+        try:
+            await asyncio.wait_for(self._input(), duration)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _input(self):
+        """Apply client actions as they arrive"""
+        while True:
+            action = await self.actions.get()
+            if action == 'quit':
+                return
+            if action == 'reset':
+                if self.core.game_over:
+                    self.core.reset()
+            else:
+                self.core.step(action)
+            self.changed.set()
+
+    async def _gravity(self):
+        """Advance one tick of game time (one frame at FPS) tick_rate times a second"""
+        loop = asyncio.get_running_loop()
+        interval = 1.0 / self.tick_rate
+        next_tick = loop.time()
+        while True:
+            next_tick += interval
+            await asyncio.sleep(next_tick - loop.time())  # Already due: just yields to the other sessions
+            late = loop.time() - next_tick
+            if late > interval:
+                self.late_ticks += 1
+                if late > 1.0:
+                    next_tick = loop.time()  # A stall: skip ahead instead of racing through the backlog
+
+            core = self.core
+            before = (core.pieces_placed, core.current_piece.y, core.game_over)
+            core.advance(1000 / FPS)
+            self.ticks += 1
+            if (core.pieces_placed, core.current_piece.y, core.game_over) != before:
+                self.changed.set()
+
+    async def _render(self):
+        """Send a frame whenever the game changed, at most FPS times a second"""
+        while True:
+            await self.changed.wait()
+            self.changed.clear()
+            frame = self.frame()
+            self.frames += 1
+            if self.send is not None:
+                await self.send(frame)
+            await asyncio.sleep(1.0 / FPS)
+
+    def frame(self):
+        """Return the screen as text: a status line, then the board with '.' for empty cells"""
+        core = self.core
+        cells = [[self.CELL_CHARS[color] if color else '.' for color in row] for row in core.grid]
+        piece = core.current_piece
+        for row, line in enumerate(piece.shape_matrix):
+            for col, filled in enumerate(line):
+                if filled and 0 <= piece.y + row < GRID_HEIGHT:
+                    cells[piece.y + row][piece.x + col] = piece.shape_name
+        status = 'over' if core.game_over else 'paused' if core.paused else 'playing'
+        lines = [f"score {core.score} level {core.level} lines {core.lines_cleared} "
+                 f"next {core.next_piece.shape_name} {status}"]
+        lines.extend(''.join(row) for row in cells)
+        return ('\n'.join(lines) + '\n').encode()
+
+
+def _placement_value(core, tetromino):
+    """Score dropping the tetromino straight down from where it is (higher is better)"""
+    landing_y = tetromino.y + core.drop_distance(tetromino)
+    heights = list(core.column_heights)
+
+    # Empty cells the piece would cover up
+    holes = 0
+    for col, bottom in SHAPE_BOTTOMS[tetromino.shape_name][tetromino.rotation]:
+        top = GRID_HEIGHT - heights[tetromino.x + col]
+        holes += max(0, top - (landing_y + bottom) - 1)
+
+    # Rows the piece would complete and the skyline it would leave
+    row_cells = {}
+    for row in range(len(tetromino.shape_matrix)):
+        for col in range(len(tetromino.shape_matrix[row])):
+            if tetromino.shape_matrix[row][col] and landing_y + row >= 0:
+                row_cells[landing_y + row] = row_cells.get(landing_y + row, 0) + 1
+                heights[tetromino.x + col] = max(heights[tetromino.x + col], GRID_HEIGHT - landing_y - row)
+    lines = sum(1 for row, cells in row_cells.items() if core.row_fill[row] + cells == GRID_WIDTH)
+    bumpiness = sum(abs(left - right) for left, right in zip(heights, heights[1:]))
+
+    return 0.76 * lines - 0.51 * sum(heights) - 0.36 * holes - 0.18 * bumpiness
+
+
+def plan_placement(core):
+    """Pick the best rotation and column for the current piece and return the actions that place it"""
+    piece = core.current_piece
+    best = None
+    for rotation, shape_matrix in enumerate(SHAPES[piece.shape_name]):
+        for x in range(1 - len(shape_matrix[0]), GRID_WIDTH):
+            if piece._check_collision(shape_matrix, x, piece.y, core.grid):
+                continue
+            value = _placement_value(core, Tetromino.from_state(PieceState(piece.shape_name, rotation, x, piece.y)))
+            if best is None or value > best[0]:
+                best = (value, rotation, x)
+
+    if best is None:
+        return [ACTION_HARD_DROP]
+    _, rotation, x = best
+    move = ACTION_RIGHT if x > piece.x else ACTION_LEFT
+    return [ACTION_ROTATE] * rotation + [move] * abs(x - piece.x) + [ACTION_HARD_DROP]
+
+
+def play_headless(core, max_pieces):
+    """Play the core with plan_placement until game over or max_pieces pieces are placed"""
+    while not core.game_over and core.pieces_placed < max_pieces:
+        for action in plan_placement(core):
+            core.step(action)
+
+
+def run_wall(boards, seed=0, frames=None):
+    """Show boards bot-played games on a SpectatorWall, restarting finished ones, and print frame timing"""
+    cores = [TetrisCore(seed + index) for index in range(boards)]
+    wall = SpectatorWall(cores)
+    plans = [(0, []) for _ in cores]  # (pieces_placed when planned, remaining actions) per board
+    clock = pygame.time.Clock()
+    elapsed = 0
+    frame = 0
+    busy = 0.0
+    running = True
+
+    while running and (frames is None or frame < frames):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                wall.invalidate()
+
+        start = time.perf_counter()
+        for index, core in enumerate(cores):
+            if core.game_over:
+                core.reset()
+                plans[index] = (0, [])
+            # Bots take turns so only a few plan a placement in any one frame
+            if (frame + index) % WALL_BOT_FRAMES_PER_ACTION == 0:
+                placed, plan = plans[index]
+                # Gravity may have locked the planned piece already; its leftover moves belong to no other piece
+                if not plan or placed != core.pieces_placed:
+                    plan = plan_placement(core)
+                    plans[index] = (core.pieces_placed, plan)
+                core.step(plan.pop(0))
+            core.advance(elapsed)
+        wall.draw()
+        busy += time.perf_counter() - start
+
+        elapsed = clock.tick(FPS)
+        frame += 1
+
+    pygame.quit()
+    if frame:
+        print(f"{boards} boards, {frame} frames: {busy / frame * 1000:.2f} ms of work per frame "
+              f"({frame / busy:,.0f} FPS without the cap)")
+
+
+def run_curses(bot=False, tick_rate=FPS, seed=None):
+    """Play in the terminal, or watch the bot play with bot=True, until q is pressed"""
+    curses.wrapper(_curses_loop, bot, tick_rate, seed)
+
+
+def _curses_loop(stdscr, bot, tick_rate, seed):
+    """Run logic ticks at tick_rate (each one frame of game time) and draw at most FPS times a second"""
+    core = TetrisCore(seed)
+    view = CursesView(stdscr, core)
+    plan = []
+    planned_for = 0  # core.pieces_placed when the plan was made
+    tick_interval = 1.0 / tick_rate
+    frame_interval = 1.0 / FPS
+    next_tick = next_frame = time.perf_counter()
+
+    while True:
+        for action in view.read_actions():
+            if action == 'quit':
+                return
+            if action == 'reset':
+                if core.game_over:
+                    core.reset()
+                    plan = []
+            elif not bot or action == ACTION_PAUSE:
+                core.step(action)
+
+        # Catch up on the logic ticks that are due, one bot action and one frame of gravity each
+        now = time.perf_counter()
+        while next_tick <= now:
+            if bot and not core.game_over and not core.paused:
+                # A piece gravity locked before the plan finished takes its leftover moves with it
+                if not plan or planned_for != core.pieces_placed:
+                    plan = plan_placement(core)
+                    planned_for = core.pieces_placed
+                core.step(plan.pop(0))
+            core.advance(1000 / FPS)
+            next_tick += tick_interval
+            if time.perf_counter() >= next_frame:
+                break  # Keep drawing and reading keys on time
+        if next_tick < now - frame_interval:
+            next_tick = now  # Too far behind (a stall, or more ticks than the CPU can run): skip ahead
+
+        if now >= next_frame:
+            view.draw()
+            next_frame = now + frame_interval
+        time.sleep(max(0.0, min(next_tick, next_frame) - time.perf_counter()))
+
+
+# Commands of the --serve protocol, one per line
+SERVE_COMMANDS = {
+    b'left': ACTION_LEFT,
+    b'right': ACTION_RIGHT,
+    b'rotate': ACTION_ROTATE,
+    b'down': ACTION_SOFT_DROP,
+    b'drop': ACTION_HARD_DROP,
+    b'pause': ACTION_PAUSE,
+    b'reset': 'reset',
+    b'quit': 'quit'
+}
 
-    def _draw_paused(self):
-        """Draw pause message"""
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 128))
-        self.screen.blit(overlay, (0, 0))
 
-        paused_text = self.big_font.render("PAUSED", True, WHITE)
-        text_rect = paused_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
-        self.screen.blit(paused_text, text_rect)
+async def _serve_client(reader, writer, tick_rate):
+    """Host one AsyncSession for a connection: commands come in one per line, frames go out after a blank line"""
+    async def send(frame):
+        writer.write(b'\n' + frame)
+        await writer.drain()
+
+    session = AsyncSession(TetrisCore(), tick_rate, send)
+    game = asyncio.create_task(session.run())
+    try:
+        while True:
+            line = await reader.readline()
+            command = SERVE_COMMANDS.get(line.strip().lower())
+            if not line or command == 'quit':
+                break
+            if command is not None:
+                session.actions.put_nowait(command)
+    except ConnectionError:
+        pass
+    finally:
+        session.actions.put_nowait('quit')
+        await game
+        writer.close()
+
+
+async def serve_sessions(port, tick_rate=FPS, host='127.0.0.1'):
+    """Accept connections on host:port, each playing its own game on this one event loop"""
+    server = await asyncio.start_server(lambda reader, writer: _serve_client(reader, writer, tick_rate), host, port)
+    print(f"Serving Tetris sessions on {host}:{port} at {tick_rate} ticks/s "
+          f"(commands: {', '.join(command.decode() for command in SERVE_COMMANDS)})")
+    async with server:
+        await server.serve_forever()
+
+
+# Columns of the self-play farm's shared result table, one row per game
+FARM_FIELDS = ('score', 'lines', 'level', 'pieces')
+
+
+def _farm_worker(worker, games, seed, max_pieces, results, elapsed):
+    """Play this worker's seeded games and write each result into its own rows of the shared table"""
+    start = time.perf_counter()
+    for game in range(games):
+        row = worker * games + game
+        core = TetrisCore(seed + row)
+        play_headless(core, max_pieces)
+        results[row * len(FARM_FIELDS):(row + 1) * len(FARM_FIELDS)] = [
+            core.score, core.lines_cleared, core.level, core.pieces_placed]
+    elapsed[worker] = time.perf_counter() - start
+
+
+def run_farm(workers, games, seed=0, max_pieces=1000):
+    """Play workers x games seeded self-play games in worker processes and print throughput and results"""
+    # Workers write straight into shared memory; nothing is pickled back per game
+    results = multiprocessing.RawArray('q', workers * games * len(FARM_FIELDS))
+    elapsed = multiprocessing.RawArray('d', workers)
+    processes = [multiprocessing.Process(target=_farm_worker,
+                                         args=(worker, games, seed, max_pieces, results, elapsed))
+                 for worker in range(workers)]
+
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    wall_time = time.perf_counter() - start
+
+    rows = [results[row * len(FARM_FIELDS):(row + 1) * len(FARM_FIELDS)] for row in range(workers * games)]
+    pieces_column = FARM_FIELDS.index('pieces')
+    print(f"{'worker':>8} {'games/s':>10} {'pieces/s':>10}")
+    for worker in range(workers):
+        pieces = sum(row[pieces_column] for row in rows[worker * games:(worker + 1) * games])
+        print(f"{worker:>8} {games / elapsed[worker]:>10.1f} {pieces / elapsed[worker]:>10.0f}")
+    total_pieces = sum(row[pieces_column] for row in rows)
+    print(f"{'total':>8} {len(rows) / wall_time:>10.1f} {total_pieces / wall_time:>10.0f}")
+    for column, field in enumerate(FARM_FIELDS):
+        print(f"mean {field}: {sum(row[column] for row in rows) / len(rows):.1f}")
+    return rows
+
+
+def benchmark_core(steps=200000, seed=0):
+    """Time headless TetrisCore steps (random action plus one frame of gravity) and print the rate"""
+    core = TetrisCore(seed)
+    rng = random.Random(seed)
+    actions = [rng.choice((ACTION_LEFT, ACTION_RIGHT, ACTION_ROTATE, ACTION_SOFT_DROP, ACTION_HARD_DROP))
+               for _ in range(steps)]
+
+    start = time.perf_counter()
+    for action in actions:
+        core.step(action)
+        core.advance(1000 / FPS)
+        if core.game_over:
+            core.reset()
+    elapsed = time.perf_counter() - start
+    print(f"{steps} steps in {elapsed:.2f}s: {steps / elapsed:,.0f} steps/s")
+
+
+def benchmark_piece_state(count=200000):
+    """Print Tetromino memory with and without __slots__, and copy vs. PieceState snapshot rates"""
+    DictTetromino = type('DictTetromino', (), {'__init__': Tetromino.__init__})  # Same attributes in a __dict__
+    old, new = DictTetromino('T'), Tetromino('T')
+    print(f"memory: {sys.getsizeof(old)} B + {sys.getsizeof(old.__dict__)} B __dict__ unslotted, "
+          f"{sys.getsizeof(new)} B slotted, PieceState {sys.getsizeof(new.get_state())} B")
+
+    def copies():
+        for _ in range(count):
+            copy.copy(old)
+
+    def snapshots():
+        for _ in range(count):
+            new.get_state()
+
+    def dict_keys():
+        seen = {}
+        for _ in range(count):
+            state = new.get_state()
+            seen[state] = True
+            state in seen
+
+    for name, run in (("copy.copy(unslotted)", copies), ("get_state()", snapshots),
+                      ("PieceState dict key set+lookup", dict_keys)):
+        start = time.perf_counter()
+        run()
+        print(f"{name}: {count / (time.perf_counter() - start) / 1e6:.2f} M/s")
+
+
+def check_overlay_allocations(frames=1000, seed=3):
+    """Draw paused and game-over frames under tracemalloc, print what they allocate and return True if nothing"""
+    game = TetrisGame(TetrisCore(seed))
+    core = game.core
+    clean = True
+
+    def traced(draw):
+        tracemalloc.start()
+        start = tracemalloc.get_traced_memory()[0]
+        for _ in range(frames):
+            draw()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return current - start, peak - start
+
+    # The bookkeeping of an empty loop is the floor every measurement is compared to
+    floor = traced(lambda: None)
+    for state in ('paused', 'game over'):
+        if state == 'paused':
+            core.step(ACTION_PAUSE)
+        else:
+            core.step(ACTION_PAUSE)
+            while not core.game_over:
+                core.step(ACTION_HARD_DROP)
+        game._draw()  # Builds and presents the overlay; later frames must reuse it
+        kept, peak = traced(game._draw)
+        print(f"{state}: {kept - floor[0]} B kept, {peak - floor[1]} B peak over {frames} frames")
+        clean = clean and kept <= floor[0] and peak <= floor[1]
+
+    # The final score is part of the game-over text, so a new score has to rebuild that overlay
+    overlay = game._overlay()
+    core.score += 100
+    rebuilt = game._overlay() is not overlay
+    print(f"game-over overlay rebuilt after a score change: {rebuilt}")
+    pygame.quit()
+    return clean and rebuilt
+
+
+def benchmark_batch(n=4096, steps=300, seed=0):
+    """Time BatchTetrisCore steps over n boards (random actions plus one frame of gravity) and print the rate"""
+    batch = BatchTetrisCore(n, seed)
+    rng = np.random.default_rng(seed)
+    actions = rng.choice([ACTION_LEFT, ACTION_RIGHT, ACTION_ROTATE, ACTION_SOFT_DROP, ACTION_HARD_DROP],
+                         size=(steps, n))
+
+    start = time.perf_counter()
+    for step_actions in actions:
+        batch.step(step_actions)
+        batch.advance(1000 / FPS)
+        if batch.game_over.any():
+            batch.reset(batch.game_over)
+    elapsed = time.perf_counter() - start
+    print(f"{n} boards x {steps} steps in {elapsed:.2f}s: {n * steps / elapsed:,.0f} transitions/s")
+
+
+async def _bot_client(session, actions_per_second, phase=0.0):
+    """Play a session through its action queue like a remote client would, restarting it after game over"""
+    plan = []
+    planned_for = 0  # pieces_placed when the plan was made
+    await asyncio.sleep(phase)
+    while True:
+        await asyncio.sleep(1.0 / actions_per_second)
+        core = session.core
+        if core.game_over:
+            session.actions.put_nowait('reset')
+            plan = []
+            continue
+        # The gravity task may have locked the piece between two of our actions
+        if not plan or planned_for != core.pieces_placed:
+            plan = plan_placement(core)
+            planned_for = core.pieces_placed
+        session.actions.put_nowait(plan.pop(0))
+
+
+async def _session_load(sessions, tick_rate, seconds):
+    """Run bot-played sessions for seconds; return (ticks, late ticks, frames, bytes sent, CPU seconds)"""
+    sent = [0]
+
+    async def send(frame):
+        sent[0] += len(frame)
+
+    async def join(session, phase):
+        await asyncio.sleep(phase)
+        await session.run(seconds)
+
+    # Clients connect at random moments, so spread the sessions' ticks and bot actions over their intervals
+    bot_rate = tick_rate / WALL_BOT_FRAMES_PER_ACTION
+    hosted = [AsyncSession(TetrisCore(seed), tick_rate, send) for seed in range(sessions)]
+    bots = [asyncio.create_task(_bot_client(session, bot_rate, index / sessions / bot_rate))
+            for index, session in enumerate(hosted)]
+    cpu = time.process_time()
+    await asyncio.gather(*(join(session, index / sessions / tick_rate) for index, session in enumerate(hosted)))
+    cpu = time.process_time() - cpu
+    for bot in bots:
+        bot.cancel()
+    await asyncio.gather(*bots, return_exceptions=True)
+    return (sum(session.ticks for session in hosted), sum(session.late_ticks for session in hosted),
+            sum(session.frames for session in hosted), sent[0], cpu)
+
+
+def benchmark_sessions(tick_rate=FPS, seconds=5, start=50):
+    """Double the number of bot-played AsyncSessions on one event loop until ticks fall behind, and print the load"""
+    best = None
+    sessions = start
+    while True:
+        ticks, late, frames, sent, cpu = asyncio.run(_session_load(sessions, tick_rate, seconds))
+        played = ticks / (sessions * tick_rate * seconds)
+        print(f"{sessions:6d} sessions: {cpu / seconds:4.0%} CPU, {played:6.1%} of ticks played, "
+              f"{late / max(ticks, 1):5.1%} late, {frames / seconds:,.0f} frames/s, {sent / seconds / 1024:,.0f} KiB/s")
+        if played < 0.99 or late > 0.01 * ticks:
+            break
+        best = (sessions, cpu / seconds)
+        sessions *= 2
+
+    # The event loop runs on one core, so the last load that kept up scales to a full core
+    if best is not None:
+        print(f"~{best[0] / best[1]:,.0f} sessions per core at {tick_rate} ticks/s "
+              f"({best[0]} sessions used {best[1]:.0%} CPU)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tetris")
+    parser.add_argument('--bench', action='store_true', help="time headless TetrisCore steps and exit")
+    parser.add_argument('--bench-state', action='store_true',
+                        help="measure Tetromino memory and PieceState snapshot rates and exit")
+    parser.add_argument('--check-overlays', action='store_true',
+                        help="check that paused and game-over frames allocate nothing (tracemalloc) and exit")
+    parser.add_argument('--bench-batch', type=int, metavar='N', help="time BatchTetrisCore over N boards and exit")
+    parser.add_argument('--farm', type=int, nargs='?', const=os.cpu_count() or 1, metavar='K',
+                        help="run seeded self-play games in K worker processes (default: all cores) and exit")
+    parser.add_argument('--games', type=int, default=10, help="games per farm worker (default: 10)")
+    parser.add_argument('--seed', type=int,
+                        help="first game seed for --farm and --wall (default: 0), "
+                             "or the --curses game seed (default: random)")
+    parser.add_argument('--wall', type=int, metavar='N', help="watch N bot-played games side by side")
+    parser.add_argument('--frames', type=int, help="stop --wall after this many frames")
+    parser.add_argument('--curses', action='store_true', help="play in the terminal instead of a window")
+    parser.add_argument('--bot', action='store_true', help="let the bot play --curses games")
+    parser.add_argument('--das', type=int, default=DAS_MS, metavar='MS',
+                        help=f"delayed auto-shift before a held left/right repeats (default: {DAS_MS})")
+    parser.add_argument('--arr', type=int, default=ARR_MS, metavar='MS',
+                        help=f"milliseconds between auto-repeated shifts, at least 1 (default: {ARR_MS})")
+    parser.add_argument('--latency', action='store_true', help="print an input-to-screen latency histogram on exit")
+    parser.add_argument('--serve', type=int, metavar='PORT',
+                        help="host headless games over TCP on PORT, one per connection, on one asyncio loop")
+    parser.add_argument('--bench-sessions', action='store_true',
+                        help="find how many bot-played asyncio sessions one core keeps on time at --tick-rate")
+    parser.add_argument('--tick-rate', type=int, default=FPS,
+                        help=f"logic ticks per second for --curses, --serve and --bench-sessions, "
+                             f"each one frame of game time, at least 1 (default: {FPS})")
+    args = parser.parse_args()
+    if args.arr < 1:
+        parser.error("--arr must be at least 1 ms")
+    if args.tick_rate < 1:
+        parser.error("--tick-rate must be at least 1 tick per second")
+    if args.farm is not None and args.farm < 1:
+        parser.error("--farm needs at least 1 worker")
+    if args.bench_batch is not None and args.bench_batch < 1:
+        parser.error("--bench-batch needs at least 1 board")
+    if args.wall is not None and args.wall < 1:
+        parser.error("--wall needs at least 1 board")
+
+    if args.bench:
+        benchmark_core()
+        return
+    if args.bench_state:
+        benchmark_piece_state()
+        return
+    if args.check_overlays:
+        raise SystemExit(0 if check_overlay_allocations() else 1)
+    if args.bench_batch is not None:
+        benchmark_batch(args.bench_batch)
+        return
+    if args.farm is not None:
+        run_farm(args.farm, args.games, args.seed or 0)
+        return
+    if args.wall is not None:
+        run_wall(args.wall, args.seed or 0, args.frames)
+        return
+    if args.curses:
+        run_curses(args.bot, args.tick_rate, args.seed)
+        return
+    if args.serve:
+        try:
+            asyncio.run(serve_sessions(args.serve, args.tick_rate))
+        except KeyboardInterrupt:
+            pass
+        return
+    if args.bench_sessions:
+        benchmark_sessions(args.tick_rate)
+        return
 
-    def _reset_game(self):
-        """Reset the game state"""
-        self.grid = [[None for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
-        self.current_piece = Tetromino()
-        self.next_piece = Tetromino()
-        self.game_over = False
-        self.paused = False
-        self.score = 0
-        self.lines_cleared = 0
-        self.level = 1
-        self.fall_speed = INITIAL_FALL_SPEED
-        self.last_fall_time = time.time()
+    game = TetrisGame(das_ms=args.das, arr_ms=args.arr)
+    game.run()
+    if args.latency:
+        print(game.latency.report())
 
 
 if __name__ == "__main__":
-    game = TetrisGame()
-    game.run()
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -1,7 +1,10 @@
+import copy
 import pygame
 import random
 import sys
 import time
+import timeit
+from collections import OrderedDict, namedtuple
 
 # --- Constants ---
 # Screen dimensions
@@ -19,6 +22,13 @@ TOP_LEFT_Y = SCREEN_HEIGHT - PLAY_HEIGHT
 GRID_COLS = 10
 GRID_ROWS = 20
 
+# Frame scheduling: game logic runs at a fixed rate, rendering is capped and the rest is slept away
+LOGIC_HZ = 200  # 5 ms ticks divide every fall speed (multiples of 50 ms) exactly
+RENDER_FPS_CAP = 60
+MAX_CATCH_UP_MS = 250  # After a longer stall the logic skips ahead instead of replaying every tick
+HEARTBEAT_MS = 1000  # Full redraw at least this often even when idle (None to disable)
+SHOW_DEBUG_OVERLAY = False  # CPU / logic Hz / FPS readout, toggled in game with F3
+
 # Colors (RGB)
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
@@ -139,9 +149,36 @@ T = [['.....',
 SHAPES = [S, Z, I, O, J, L, T]
 SHAPE_COLORS = [GREEN, RED, CYAN, YELLOW, BLUE, ORANGE, MAGENTA]
 
+# Palette of the 8-bit board image: index 0 is an empty cell, shape i is index i + 1
+PALETTE = [BLACK] + SHAPE_COLORS
+PALETTE_INDEX = {color: i for i, color in enumerate(PALETTE)}
+
+
+def parse_shape_format(shape_format):
+    """ Parses one 5x5 string rotation into a tuple of (dx, dy) block offsets """
+    offsets = []
+    for i, line in enumerate(shape_format):
+        for j, column in enumerate(line):
+            if column == '0':
+                # Subtracting 2 centers the 5x5 shape format around the piece's (x, y) point
+                offsets.append((j - 2, i - 2))
+    return tuple(offsets)
+
+
+# (shape index, rotation) -> (dx, dy) block offsets, compiled once so nothing re-parses the strings
+SHAPE_OFFSETS = {(shape_index, rotation): parse_shape_format(shape_format)
+                 for shape_index, shape in enumerate(SHAPES)
+                 for rotation, shape_format in enumerate(shape)}
+
+
+# Piece position saved by Piece.get_state() and restored by Piece.from_state()
+PieceState = namedtuple('PieceState', ['shape_index', 'rotation', 'x', 'y'])
+
 
 # --- Piece Class ---
 class Piece:
+    __slots__ = ('x', 'y', 'shape_index', 'shape', 'color', 'rotation')
+
     def __init__(self, x, y, shape_index):
         self.x = x
         self.y = y
@@ -150,76 +187,75 @@ class Piece:
         self.color = SHAPE_COLORS[shape_index]
         self.rotation = 0  # Index for shape rotation state
 
+    @classmethod
+    def from_state(cls, state):
+        """ Creates a piece from a PieceState """
+        piece = cls(state.x, state.y, state.shape_index)
+        piece.rotation = state.rotation
+        return piece
+
+    def get_state(self):
+        """ Returns the piece as an immutable PieceState """
+        return PieceState(self.shape_index, self.rotation % len(self.shape), self.x, self.y)
+
     def get_formatted_shape(self):
         """ Returns the current rotation's shape definition """
         return self.shape[self.rotation % len(self.shape)]
 
+    def get_offsets(self):
+        """ Returns the current rotation's precompiled (dx, dy) block offsets """
+        return SHAPE_OFFSETS[(self.shape_index, self.rotation % len(self.shape))]
+
     def get_positions(self):
         """ Returns a list of (row, col) grid coordinates for the piece's blocks """
-        positions = []
-        shape_format = self.get_formatted_shape()
-        # Iterate through the 5x5 format string
-        for i, line in enumerate(shape_format):
-            row = list(line)
-            for j, column in enumerate(row):
-                if column == '0':
-                    # Adjust for piece's top-left position (self.x, self.y)
-                    # The format is relative, usually centered, adjust row/col offsets
-                    # Example: A '.' at (0,0) in format maps to (y-2, x-2) approx
-                    # Simpler: Assume format's top-left (0,0) maps to piece's (y,x)
-                    positions.append((self.y + i, self.x + j))
-
-        # Adjust offsets if needed based on how shapes are defined (center vs top-left)
-        # This current implementation assumes the '0's are relative to piece's (y,x)
-        # A common convention is relative to a pivot point, often near the center.
-        # Let's adjust slightly to center better for a 5x5 representation
-        offset_y = -2
-        offset_x = -2
-        final_positions = []
-        for pos in positions:
-            final_positions.append((pos[0] + offset_y, pos[1] + offset_x))
-
-        return final_positions
+        x, y = self.x, self.y
+        return [(y + dy, x + dx) for dx, dy in self.get_offsets()]
+
+
+# --- Board Class ---
+class Board:
+    """ Persistent play area: one integer bitmask per row plus the landed cell palette indices """
+    FULL_ROW = (1 << GRID_COLS) - 1  # Mask of a row with every column occupied
+
+    def __init__(self):
+        # Bit c of rows[r] is set when cell (c, r) holds a landed block
+        self.rows = [0] * GRID_ROWS
+        # PALETTE index of every cell, row-major; also the pixel buffer of the board image
+        self.cells = bytearray(GRID_ROWS * GRID_COLS)
+        self.image = None
+
+    def lock(self, positions, color):
+        """ Writes a landed piece into the board (cells above the top are dropped) """
+        index = PALETTE_INDEX[color]
+        for col, row in positions:
+            if 0 <= row < GRID_ROWS and 0 <= col < GRID_COLS:
+                self.rows[row] |= 1 << col
+                self.cells[row * GRID_COLS + col] = index
+
+    def get_image(self):
+        """ Returns an 8-bit Surface with one pixel per cell that shares the cells buffer """
+        if self.image is None:
+            self.image = pygame.image.frombuffer(self.cells, (GRID_COLS, GRID_ROWS), 'P')
+            self.image.set_palette(PALETTE)
+        return self.image
 
 
 # --- Game Functions ---
 
-def create_grid(locked_positions={}):
-    """ Creates the game grid (list of lists) """
-    # Initialize grid with black (empty) cells
-    grid = [[BLACK for _ in range(GRID_COLS)] for _ in range(GRID_ROWS)]
-
-    # Fill grid with colors of landed pieces
-    for r in range(GRID_ROWS):
-        for c in range(GRID_COLS):
-            if (c, r) in locked_positions:
-                color = locked_positions[(c, r)]
-                grid[r][c] = color
-    return grid
+def create_grid():
+    """ Creates an empty game board """
+    return Board()
 
 
 def convert_shape_format(piece):
-    """ Converts the string format shape into grid coordinates """
-    positions = []
-    shape_format = piece.get_formatted_shape()
-    # Iterate through the 5x5 format string
-    for i, line in enumerate(shape_format):
-        row = list(line)
-        for j, column in enumerate(row):
-            if column == '0':
-                # Relative positions from piece's top-left (y, x)
-                # Subtracting 2 centers the 5x5 shape format around the (y,x) point
-                positions.append((piece.y + i - 2, piece.x + j - 2))
-    return positions
+    """ Converts the piece's shape into (col, row) grid coordinates """
+    x, y = piece.x, piece.y
+    return [(x + dx, y + dy) for dx, dy in piece.get_offsets()]
 
 
-def is_valid_space(piece, grid):
+def is_valid_space(piece, board):
     """ Checks if the piece's current position is valid (within bounds, not colliding) """
-    # Get all possible grid positions (including empty cells)
-    accepted_pos = [[(c, r) for c in range(GRID_COLS) if grid[r][c] == BLACK] for r in range(GRID_ROWS)]
-    # Flatten the list
-    accepted_pos = [pos for sublist in accepted_pos for pos in sublist]
-
+    rows = board.rows
     formatted_shape = convert_shape_format(piece)
 
     for pos in formatted_shape:
@@ -231,7 +267,7 @@ def is_valid_space(piece, grid):
         if row < 0:
             continue  # Part of the shape is above the screen, which is okay initially
         # Check if the position is already occupied by a locked piece
-        if (col, row) not in accepted_pos:
+        if rows[row] & (1 << col):
             return False
     return True
 
@@ -263,17 +299,43 @@ def get_shape(shapes, shape_colors):
     return Piece(GRID_COLS // 2, 0, shape_index)  # Start at col 5, row 0 (top)
 
 
+# --- Fonts and Labels ---
+LABEL_CACHE_SIZE = 64  # Rendered labels kept around; HUD text only changes with the score
+
+_fonts = {}  # (name, size, bold) -> Font
+_labels = OrderedDict()  # (text, font, color) -> rendered Surface, least recently used first
+
+
+def get_font(name, size, bold=False):
+    """ Returns the system font for a face and size, loading each one only once """
+    key = (name, size, bold)
+    font = _fonts.get(key)
+    if font is None:
+        font = _fonts[key] = pygame.font.SysFont(name, size, bold=bold)
+    return font
+
+
+def render_label(text, font, color):
+    """ Returns the rendered text, re-rendering only labels that are not in the LRU cache """
+    key = (text, font, color)
+    label = _labels.get(key)
+    if label is None:
+        label = _labels[key] = font.render(text, 1, color)
+        if len(_labels) > LABEL_CACHE_SIZE:
+            _labels.popitem(last=False)  # Drop the least recently used label
+    else:
+        _labels.move_to_end(key)
+    return label
+
+
 def draw_text_middle(surface, text, size, color):
     """ Draws text centered on the screen """
-    font = pygame.font.SysFont('comicsansms', size, bold=True)
-    label = font.render(text, 1, color)
-    surface.blit(label, (SCREEN_WIDTH / 2 - label.get_width() / 2, SCREEN_HEIGHT / 2 - label.get_height() / 2))
+    label = render_label(text, get_font('comicsansms', size, bold=True), color)
+    return surface.blit(label, (SCREEN_WIDTH / 2 - label.get_width() / 2, SCREEN_HEIGHT / 2 - label.get_height() / 2))
 
 
-def draw_grid_lines(surface, grid):
-    """ Draws the grid lines on the play area """
-    sx = TOP_LEFT_X
-    sy = TOP_LEFT_Y
+def draw_grid_lines(surface, sx=TOP_LEFT_X, sy=TOP_LEFT_Y):
+    """ Draws the grid lines on the play area, whose top left corner is at (sx, sy) """
     # Horizontal lines
     for i in range(GRID_ROWS + 1):
         pygame.draw.line(surface, GRAY, (sx, sy + i * BLOCK_SIZE), (sx + PLAY_WIDTH, sy + i * BLOCK_SIZE))
@@ -282,117 +344,238 @@ def draw_grid_lines(surface, grid):
         pygame.draw.line(surface, GRAY, (sx + j * BLOCK_SIZE, sy), (sx + j * BLOCK_SIZE, sy + PLAY_HEIGHT))
 
 
-def clear_rows(grid, locked):
-    """ Clears completed rows and shifts rows above down """
-    rows_cleared = 0
-    new_locked = {}
-    rows_to_check = list(range(GRID_ROWS))
-    rows_to_check.reverse()  # Check from bottom up
-
-    rows_to_keep = []  # Rows indices that are *not* full
-
-    for r in rows_to_check:
-        row_full = True
-        for c in range(GRID_COLS):
-            if grid[r][c] == BLACK:
-                row_full = False
-                break
-        if row_full:
-            rows_cleared += 1
-            # Don't add this row index to rows_to_keep
-        else:
-            rows_to_keep.insert(0, r)  # Add non-full rows to the top of the list
+def clear_rows(board):
+    """ Clears completed rows and shifts rows above down, returns the number cleared """
+    # Rows indices that are *not* full, top to bottom
+    rows_to_keep = [r for r in range(GRID_ROWS) if board.rows[r] != Board.FULL_ROW]
+    rows_cleared = GRID_ROWS - len(rows_to_keep)
 
     if rows_cleared > 0:
-        # Create new locked positions based on kept rows
-        kept_locked_positions = {}
-        for (c, r) in locked:
-            if r in rows_to_keep:
-                kept_locked_positions[(c, r)] = locked[(c, r)]
-
-        # Shift rows down
-        # Calculate how much each kept row needs to shift down
-        shift_map = {kept_row: GRID_ROWS - 1 - i for i, kept_row in enumerate(reversed(rows_to_keep))}
-
-        for (c, r) in kept_locked_positions:
-            new_r = shift_map[r]
-            new_locked[(c, new_r)] = kept_locked_positions[(c, r)]
-
-        return rows_cleared, new_locked
-    else:
-        return 0, locked  # No changes
+        # Kept rows slide to the bottom in order; empty rows refill the top
+        board.rows = [0] * rows_cleared + [board.rows[r] for r in rows_to_keep]
+        # Same-size update in place: the board image keeps viewing this buffer
+        board.cells[:] = bytes(rows_cleared * GRID_COLS) + b''.join(
+            board.cells[r * GRID_COLS:(r + 1) * GRID_COLS] for r in rows_to_keep)
+    return rows_cleared
 
 
-def draw_next_shape(piece, surface):
+def draw_next_shape(piece, surface, dirty=None):
     """ Draws the next piece preview """
-    font = pygame.font.SysFont('comicsansms', 30)
-    label = font.render('Next Shape', 1, WHITE)
+    label = render_label('Next Shape', get_font('comicsansms', 30), WHITE)
 
     sx = TOP_LEFT_X + PLAY_WIDTH + 40  # Position for next shape display
     sy = TOP_LEFT_Y + PLAY_HEIGHT / 2 - 100
-    format = piece.get_formatted_shape()
 
     surface.blit(label, (sx, sy - 30))
 
     # Draw the piece shape centered in the preview area
-    for i, line in enumerate(format):
-        row = list(line)
-        for j, column in enumerate(row):
-            if column == '0':
-                # Adjust drawing position to center the 5x5 representation
-                pygame.draw.rect(surface, piece.color,
-                                 (sx + (j - 1.5) * BLOCK_SIZE, sy + (i - 1) * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE), 0)
-                pygame.draw.rect(surface, GRAY,
-                                 (sx + (j - 1.5) * BLOCK_SIZE, sy + (i - 1) * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE),
-                                 1)  # Border
+    drawn = []
+    for dx, dy in piece.get_offsets():
+        rect = (sx + (dx + 0.5) * BLOCK_SIZE, sy + (dy + 1) * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE)
+        drawn.append(pygame.draw.rect(surface, piece.color, rect, 0))
+        pygame.draw.rect(surface, GRAY, rect, 1)  # Border
+
+    if dirty is not None:
+        dirty.mark('next', drawn[0].unionall(drawn), (piece.shape_index, piece.rotation))
 
 
-def draw_window(surface, grid, score=0, level=1, lines=0):
-    """ Draws everything onto the game window """
-    surface.fill(BLACK)  # Black background
+def build_background(size):
+    """ Renders the static layer (background, title, border and grid lines) for a window size """
+    background = pygame.Surface(size)
+    background.fill(BLACK)  # Black background
 
     # Title
-    font = pygame.font.SysFont('comicsansms', 40)
-    label = font.render('TETRIS', 1, WHITE)
-    surface.blit(label, (TOP_LEFT_X + PLAY_WIDTH / 2 - (label.get_width() / 2), 30))
+    label = render_label('TETRIS', get_font('comicsansms', 40), WHITE)
+    background.blit(label, (TOP_LEFT_X + PLAY_WIDTH / 2 - (label.get_width() / 2), 30))
+
+    # Draw the grid border and lines
+    pygame.draw.rect(background, WHITE, (TOP_LEFT_X, TOP_LEFT_Y, PLAY_WIDTH, PLAY_HEIGHT), 4)  # Border around play area
+    draw_grid_lines(background)
+    return background
+
+
+_background_cache = {}  # Window size -> static layer, rebuilt only when the window changes
+
+
+def get_background(surface):
+    """ Returns the cached static layer for the surface, building it on first use or after a resize """
+    size = surface.get_size()
+    background = _background_cache.get(size)
+    if background is None:
+        _background_cache.clear()
+        background = _background_cache[size] = build_background(size).convert(surface)
+    return background
+
+
+def build_grid_overlay():
+    """ Renders the play area border and grid lines alone, with black as the transparent color """
+    overlay = pygame.Surface((PLAY_WIDTH + 1, PLAY_HEIGHT + 1))  # Last grid lines sit one pixel past the area
+    overlay.fill(BLACK)
+    overlay.set_colorkey(BLACK, pygame.RLEACCEL)  # Never changes, so run-length encoding pays off
+    pygame.draw.rect(overlay, WHITE, (0, 0, PLAY_WIDTH, PLAY_HEIGHT), 4)
+    draw_grid_lines(overlay, 0, 0)
+    return overlay
+
+
+_board_layers = {}  # Scaled-up cell image, the cells it was scaled from and the grid overlay
+
+
+def draw_board(surface, board):
+    """ Draws the landed cells with a constant number of calls, whatever the board holds """
+    if not _board_layers:
+        cells = pygame.Surface((PLAY_WIDTH, PLAY_HEIGHT), 0, 8)
+        cells.set_palette(PALETTE)
+        cells.set_colorkey(BLACK)  # Empty cells let the background show through
+        _board_layers['cells'] = cells
+        _board_layers['scaled'] = None
+        _board_layers['grid'] = build_grid_overlay().convert(surface)
+
+    # One pixel per cell, scaled up to BLOCK_SIZE only when a lock or clear changed it
+    cells = _board_layers['cells']
+    if _board_layers['scaled'] != board.cells:
+        pygame.transform.scale(board.get_image(), (PLAY_WIDTH, PLAY_HEIGHT), cells)
+        _board_layers['scaled'] = bytes(board.cells)
+    surface.blit(cells, (TOP_LEFT_X, TOP_LEFT_Y))
+
+    # The grid lines and border go back on top of the cells
+    surface.blit(_board_layers['grid'], (TOP_LEFT_X, TOP_LEFT_Y))
+
+
+def draw_window(surface, board, score=0, level=1, lines=0, dirty=None):
+    """ Draws everything onto the game window, marking changed regions on dirty if given """
+    surface.blit(get_background(surface), (0, 0))  # Background, title, border and grid lines
 
     # Score, Level, Lines
-    font = pygame.font.SysFont('comicsansms', 25)
-    score_label = font.render(f'Score: {score}', 1, WHITE)
-    level_label = font.render(f'Level: {level}', 1, WHITE)
-    lines_label = font.render(f'Lines: {lines}', 1, WHITE)
+    font = get_font('comicsansms', 25)
+    score_label = render_label(f'Score: {score}', font, WHITE)
+    level_label = render_label(f'Level: {level}', font, WHITE)
+    lines_label = render_label(f'Lines: {lines}', font, WHITE)
 
     sx_info = TOP_LEFT_X - 120  # Position for score/level info
     sy_info = TOP_LEFT_Y + 100
 
-    surface.blit(score_label, (sx_info, sy_info))
-    surface.blit(level_label, (sx_info, sy_info + 40))
-    surface.blit(lines_label, (sx_info, sy_info + 80))
+    score_rect = surface.blit(score_label, (sx_info, sy_info))
+    level_rect = surface.blit(level_label, (sx_info, sy_info + 40))
+    lines_rect = surface.blit(lines_label, (sx_info, sy_info + 80))
+    if dirty is not None:
+        dirty.mark('score', score_rect, score)
+        dirty.mark('level', level_rect, level)
+        dirty.mark('lines', lines_rect, lines)
+
+    # Draw the landed cells
+    draw_board(surface, board)
+    if dirty is not None:
+        for r in range(GRID_ROWS):
+            dirty.mark(('row', r), pygame.Rect(TOP_LEFT_X, TOP_LEFT_Y + r * BLOCK_SIZE, PLAY_WIDTH, BLOCK_SIZE),
+                       board.cells[r * GRID_COLS:(r + 1) * GRID_COLS])
 
-    # Draw the grid cells based on their colors
-    for r in range(GRID_ROWS):
-        for c in range(GRID_COLS):
-            pygame.draw.rect(surface, grid[r][c],
-                             (TOP_LEFT_X + c * BLOCK_SIZE, TOP_LEFT_Y + r * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE), 0)
+    # draw_next_shape is called separately in main loop after grid update
 
-    # Draw the grid border and lines
-    pygame.draw.rect(surface, WHITE, (TOP_LEFT_X, TOP_LEFT_Y, PLAY_WIDTH, PLAY_HEIGHT), 4)  # Border around play area
-    draw_grid_lines(surface, grid)
 
-    # draw_next_shape is called separately in main loop after grid update
+# --- Dirty Rectangles ---
+class DirtyRects:
+    """ Remembers what each screen region showed last frame and pushes only the regions that changed """
+
+    def __init__(self):
+        self.shown = {}  # Region key -> (rect, value) as last sent to the display
+        self.rects = []  # Rects to send on the next update
+        self.full = True  # The first update covers the whole window
+
+    def mark(self, key, rect, value):
+        """ Records what a region shows this frame; both its old and new rect are sent if it changed """
+        old = self.shown.get(key)
+        if old is not None and old[1] == value:
+            return
+        self.shown[key] = (rect, value)
+        self.rects.append(rect)
+        if old is not None and old[0] != rect:
+            self.rects.append(old[0])
+
+    def invalidate(self):
+        """ Sends the whole window on the next update """
+        self.full = True
+
+    def update(self):
+        """ Sends the changed regions to the display """
+        if self.full:
+            pygame.display.update()
+            self.full = False
+        elif self.rects:
+            pygame.display.update(self.rects)
+        self.rects.clear()
+
+
+# --- Frame Scheduler ---
+class FrameScheduler:
+    """ Paces a loop that runs one logic tick per pass, deciding when to render and sleeping in between """
+
+    def __init__(self, logic_hz=LOGIC_HZ, fps_cap=RENDER_FPS_CAP):
+        self.tick_ms = 1000 / logic_hz
+        self.frame_ms = 1000 / fps_cap
+        now = time.perf_counter() * 1000
+        self.next_tick = now
+        self.next_frame = now
+
+        # Debug overlay readings, measured over one second windows
+        self.cpu = self.logic_hz = self.fps = 0.0
+        self.window_start = now
+        self.window_cpu = time.process_time()
+        self.ticks = self.frames = 0
+
+    def wait_for_tick(self):
+        """ Sleeps until the next logic tick is due; returns True when the debug readings were refreshed """
+        now = time.perf_counter() * 1000
+        if self.next_tick > now:
+            time.sleep((self.next_tick - now) / 1000)
+        elif now - self.next_tick > MAX_CATCH_UP_MS:
+            self.next_tick = now  # Stalled (window dragged, game over pause...): don't fast-forward
+        self.next_tick += self.tick_ms
+        self.ticks += 1
+
+        now = time.perf_counter() * 1000
+        if now - self.window_start < 1000:
+            return False
+        seconds = (now - self.window_start) / 1000
+        self.cpu = 100 * (time.process_time() - self.window_cpu) / seconds
+        self.logic_hz = self.ticks / seconds
+        self.fps = self.frames / seconds
+        self.window_start = now
+        self.window_cpu = time.process_time()
+        self.ticks = self.frames = 0
+        return True
+
+    def frame_due(self):
+        """ Returns True when the render cap allows another frame """
+        return time.perf_counter() * 1000 >= self.next_frame
+
+    def frame_drawn(self):
+        """ Books a rendered frame against the cap """
+        self.frames += 1
+        self.next_frame = max(self.next_frame + self.frame_ms, time.perf_counter() * 1000)
+
+
+def draw_debug_overlay(surface, scheduler, dirty):
+    """ Draws the measured CPU use, logic rate and frame rate in the top left corner """
+    label = render_label(f'CPU {scheduler.cpu:.0f}%  logic {scheduler.logic_hz:.0f} Hz  {scheduler.fps:.0f} FPS',
+                         get_font('comicsansms', 14), YELLOW)
+    dirty.mark('debug', surface.blit(label, (4, 4)), label)
 
 
 # --- Main Game Loop ---
+def heartbeat_due(last_draw):
+    """ Returns True when an idle screen should be redrawn anyway """
+    return HEARTBEAT_MS is not None and pygame.time.get_ticks() - last_draw >= HEARTBEAT_MS
+
+
 def main(win):
-    locked_positions = {}  # (x, y): (r, g, b)
-    grid = create_grid(locked_positions)
+    board = create_grid()  # Updated only when a piece locks or rows clear
 
     change_piece = False
     run = True
     current_piece = get_shape(SHAPES, SHAPE_COLORS)
     next_piece = get_shape(SHAPES, SHAPE_COLORS)
-    clock = pygame.time.Clock()
-    fall_time = 0
+    scheduler = FrameScheduler()
+    fall_time = 0  # Milliseconds of game time since the last gravity step
     level_time = 0  # Time counter for increasing speed
     fall_speed = 0.50  # Seconds per grid block drop initially (Higher is slower)
     base_fall_speed = fall_speed  # Store initial speed
@@ -401,21 +584,28 @@ def main(win):
     score = 0
     level = 1
     lines_cleared_total = 0
+    dirty = DirtyRects()  # Only the regions that changed since the last frame are sent to the display
+    version = 0  # Bumped whenever anything shown on screen may have changed
+    drawn_version = -1  # Version of the last presented frame
+    last_draw = 0
+    show_debug = SHOW_DEBUG_OVERLAY
 
     while run:
-        grid = create_grid(locked_positions)  # Update grid based on locked pieces
-        fall_time += clock.get_rawtime()  # Time since last frame in ms
-        level_time += clock.get_rawtime()
-        clock.tick()  # Control frame rate
+        # One fixed logic tick per pass; the scheduler sleeps until it is due
+        if scheduler.wait_for_tick() and show_debug:
+            version += 1  # New debug readings to show
+        fall_time += scheduler.tick_ms
+        level_time += scheduler.tick_ms
 
         # --- Auto Fall Logic ---
         if not paused:
             # Convert fall_speed (seconds) to milliseconds
-            if fall_time / 1000 >= fall_speed:
+            if fall_time >= round(fall_speed * 1000):
                 fall_time = 0
+                version += 1
                 current_piece.y += 1
                 # Check if the new position is valid
-                if not is_valid_space(current_piece, grid) or current_piece.y > GRID_ROWS:
+                if not is_valid_space(current_piece, board) or current_piece.y > GRID_ROWS:
                     # If invalid after moving down, it hit something or went out of bounds
                     current_piece.y -= 1  # Revert the move
                     change_piece = True  # Lock the piece
@@ -428,24 +618,28 @@ def main(win):
                 quit()
 
             if event.type == pygame.KEYDOWN:
+                version += 1
+
                 if event.key == pygame.K_p:  # Pause Toggle
                     paused = not paused
+                if event.key == pygame.K_F3:  # Debug overlay toggle
+                    show_debug = not show_debug
 
                 if not paused:
                     if event.key == pygame.K_LEFT:
                         current_piece.x -= 1
-                        if not is_valid_space(current_piece, grid):
+                        if not is_valid_space(current_piece, board):
                             current_piece.x += 1  # Revert if invalid
 
                     elif event.key == pygame.K_RIGHT:
                         current_piece.x += 1
-                        if not is_valid_space(current_piece, grid):
+                        if not is_valid_space(current_piece, board):
                             current_piece.x -= 1  # Revert
 
                     elif event.key == pygame.K_DOWN:
                         # Soft drop: Move down faster
                         current_piece.y += 1
-                        if not is_valid_space(current_piece, grid):
+                        if not is_valid_space(current_piece, board):
                             current_piece.y -= 1  # Revert
                             # Optional: Could lock piece immediately on down press collision
                             # change_piece = True
@@ -455,19 +649,19 @@ def main(win):
                     elif event.key == pygame.K_UP:
                         # Rotate
                         current_piece.rotation = (current_piece.rotation + 1) % len(current_piece.shape)
-                        if not is_valid_space(current_piece, grid):
+                        if not is_valid_space(current_piece, board):
                             # Basic wall kick attempt (try moving left/right) - Very simple version
                             original_x = current_piece.x
 
                             # Try moving left
                             current_piece.x -= 1
-                            if is_valid_space(current_piece, grid):
+                            if is_valid_space(current_piece, board):
                                 continue  # Keep rotated and moved position
                             current_piece.x = original_x  # Revert move left
 
                             # Try moving right
                             current_piece.x += 1
-                            if is_valid_space(current_piece, grid):
+                            if is_valid_space(current_piece, board):
                                 continue  # Keep rotated and moved position
                             current_piece.x = original_x  # Revert move right
 
@@ -479,7 +673,7 @@ def main(win):
                     elif event.key == pygame.K_SPACE:
                         # Hard drop
                         original_y = current_piece.y
-                        while is_valid_space(current_piece, grid):
+                        while is_valid_space(current_piece, board):
                             current_piece.y += 1
                         current_piece.y -= 1  # Move back to last valid position
                         score += (current_piece.y - original_y) * 2  # Score bonus for hard drop distance
@@ -487,13 +681,10 @@ def main(win):
 
         # --- Lock Piece Logic ---
         if change_piece and not paused:
-            piece_pos = convert_shape_format(current_piece)
-            for pos in piece_pos:
-                p = (pos[0], pos[1])
-                locked_positions[p] = current_piece.color
+            board.lock(convert_shape_format(current_piece), current_piece.color)
 
             # --- Check for Cleared Rows ---
-            rows_cleared_now, locked_positions = clear_rows(grid, locked_positions)
+            rows_cleared_now = clear_rows(board)
 
             # Update Score based on lines cleared at once
             if rows_cleared_now == 1:
@@ -523,35 +714,59 @@ def main(win):
 
             # --- Check Game Over ---
             # If the new piece spawns in an invalid position, game over
-            if not is_valid_space(current_piece, grid):
+            if not is_valid_space(current_piece, board):
                 run = False  # End the game loop
 
         # --- Drawing ---
+        # Render at most RENDER_FPS_CAP times a second (the final frame always goes out)
+        if run and not scheduler.frame_due():
+            continue
+        # Nothing changed since the last frame (paused, or waiting for gravity): skip the render
+        if version == drawn_version:
+            if not heartbeat_due(last_draw):
+                continue
+            dirty.invalidate()  # Heartbeat: resend the whole window
+        drawn_version = version
+        last_draw = pygame.time.get_ticks()
+
         # Draw static elements (grid, background, text)
-        draw_window(win, grid, score, level, lines_cleared_total)
+        draw_window(win, board, score, level, lines_cleared_total, dirty)
 
         # Draw the current piece
+        piece_rect = pygame.Rect(0, 0, 0, 0)
         if not paused:
             piece_pos = convert_shape_format(current_piece)
             for pos in piece_pos:
                 # Only draw blocks that are within the visible grid area
                 if pos[1] >= 0:  # Check row index (y)
-                    pygame.draw.rect(win, current_piece.color,
-                                     (TOP_LEFT_X + pos[0] * BLOCK_SIZE, TOP_LEFT_Y + pos[1] * BLOCK_SIZE,
-                                      BLOCK_SIZE, BLOCK_SIZE), 0)
+                    rect = pygame.draw.rect(win, current_piece.color,
+                                            (TOP_LEFT_X + pos[0] * BLOCK_SIZE, TOP_LEFT_Y + pos[1] * BLOCK_SIZE,
+                                             BLOCK_SIZE, BLOCK_SIZE), 0)
                     pygame.draw.rect(win, GRAY,  # Border for current piece
                                      (TOP_LEFT_X + pos[0] * BLOCK_SIZE, TOP_LEFT_Y + pos[1] * BLOCK_SIZE,
                                       BLOCK_SIZE, BLOCK_SIZE), 1)
+                    piece_rect = piece_rect.union(rect) if piece_rect else rect
+            dirty.mark('piece', piece_rect, (tuple(piece_pos), current_piece.color))
+        else:
+            dirty.mark('piece', piece_rect, None)
 
         # Draw the next piece preview
-        draw_next_shape(next_piece, win)
+        draw_next_shape(next_piece, win, dirty)
 
         # Draw Pause message
         if paused:
-            draw_text_middle(win, "PAUSED", 60, WHITE)
+            dirty.mark('paused', draw_text_middle(win, "PAUSED", 60, WHITE), True)
+        else:
+            dirty.mark('paused', pygame.Rect(0, 0, 0, 0), False)
 
-        # Update the display
-        pygame.display.update()
+        if show_debug:
+            draw_debug_overlay(win, scheduler, dirty)
+        else:
+            dirty.mark('debug', pygame.Rect(0, 0, 0, 0), None)
+
+        # Update the changed parts of the display
+        dirty.update()
+        scheduler.frame_drawn()
 
     # --- Game Over Screen ---
     draw_text_middle(win, f"GAME OVER! Score: {score}", 50, RED)
@@ -562,23 +777,77 @@ def main(win):
 def main_menu(win):
     """ Displays the main menu """
     run = True
+    last_draw = None  # The menu text is static, so it is only drawn again on a heartbeat or expose
     while run:
-        win.fill(BLACK)
-        draw_text_middle(win, 'Press Any Key To Play Tetris', 40, WHITE)
-        pygame.display.update()
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                run = False
-                pygame.display.quit()
-                quit()
-            if event.type == pygame.KEYDOWN:
-                main(win)  # Start the game
+        if last_draw is None or heartbeat_due(last_draw):
+            win.fill(BLACK)
+            draw_text_middle(win, 'Press Any Key To Play Tetris', 40, WHITE)
+            pygame.display.update()
+            last_draw = pygame.time.get_ticks()
+        # Sleep until an event arrives or the next heartbeat is due (timeout 0 waits forever)
+        event = pygame.event.wait(HEARTBEAT_MS or 0)
+        if event.type == pygame.VIDEOEXPOSE:
+            last_draw = None
+        if event.type == pygame.QUIT:
+            run = False
+            pygame.display.quit()
+            quit()
+        if event.type == pygame.KEYDOWN:
+            main(win)  # Start the game
+            last_draw = None  # The game over screen is still showing
 
     pygame.quit()
 
 
+# --- Benchmark ---
+def benchmark_shape_lookup(number=200000):
+    """ Prints the per-call cost of re-parsing the shape strings vs. the precompiled offset table """
+    piece = Piece(GRID_COLS // 2, 0, SHAPES.index(T))
+
+    def reparse():
+        # The original convert_shape_format, kept here as the baseline (in (col, row) order like the table)
+        positions = []
+        shape_format = piece.get_formatted_shape()
+        for i, line in enumerate(shape_format):
+            row = list(line)
+            for j, column in enumerate(row):
+                if column == '0':
+                    positions.append((piece.x + j - 2, piece.y + i - 2))
+        return positions
+
+    assert reparse() == convert_shape_format(piece)
+
+    for name, func in (('string re-parse', reparse), ('offset table', lambda: convert_shape_format(piece))):
+        best = min(timeit.repeat(func, number=number, repeat=5))
+        print(f"{name:>16}: {best / number * 1e9:8.1f} ns/call")
+
+
+def benchmark_piece_state(number=200000):
+    """ Prints Piece memory with and without __slots__, and the cost of copying a piece vs. taking a PieceState """
+    DictPiece = type('DictPiece', (), {'__init__': Piece.__init__})  # Same attributes, stored in a __dict__
+    old, new = DictPiece(GRID_COLS // 2, 0, SHAPES.index(T)), Piece(GRID_COLS // 2, 0, SHAPES.index(T))
+    print(f"{'memory':>16}: {sys.getsizeof(old)} B + {sys.getsizeof(old.__dict__)} B __dict__ unslotted, "
+          f"{sys.getsizeof(new)} B slotted, PieceState {sys.getsizeof(new.get_state())} B")
+
+    seen = {}
+
+    def state_key():
+        state = new.get_state()
+        seen[state] = True
+        return state in seen
+
+    for name, func in (('copy.copy', lambda: copy.copy(old)), ('get_state', new.get_state), ('state dict key', state_key)):
+        best = min(timeit.repeat(func, number=number, repeat=5))
+        print(f"{name:>16}: {best / number * 1e9:8.1f} ns/call")
+
+
 # --- Initialization ---
 if __name__ == "__main__":
+    if '--bench' in sys.argv:
+        benchmark_shape_lookup()
+        benchmark_piece_state()
+        sys.exit()
+
     pygame.font.init()
     pygame.mixer.init()  # If you want to add sound later
 
@@ -15,6 +15,9 @@ BLOCK_SIZE = 30
 TOP_LEFT_X = (SCREEN_WIDTH - PLAY_WIDTH) // 2
 TOP_LEFT_Y = SCREEN_HEIGHT - PLAY_HEIGHT - 50
 
+# The main menu waits for events and only repaints itself this often (ms)
+MENU_REDRAW_MS = 1000
+
 # Define the shapes
 S = [['.....',
       '.....',
@@ -344,15 +347,19 @@ def main():
 
 def main_menu():
     run = True
+    redraw = True
     while run:
-        win.fill((0, 0, 0))
-        draw_text_middle('Press Any Key To Play', 60, (255, 255, 255), win)
-        pygame.display.update()
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                run = False
-            if event.type == pygame.KEYDOWN:
-                main()
+        if redraw:
+            win.fill((0, 0, 0))
+            draw_text_middle('Press Any Key To Play', 60, (255, 255, 255), win)
+            pygame.display.update()
+        event = pygame.event.wait(MENU_REDRAW_MS)
+        redraw = event.type in (pygame.NOEVENT, pygame.VIDEOEXPOSE)
+        if event.type == pygame.QUIT:
+            run = False
+        if event.type == pygame.KEYDOWN:
+            main()
+            redraw = True
     pygame.quit()
 
 
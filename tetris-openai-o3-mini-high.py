@@ -1,5 +1,7 @@
 import pygame
 import random
+import sys
+from collections import OrderedDict
 
 # Initialize fonts in pygame
 pygame.font.init()
@@ -221,12 +223,39 @@ def get_shape():
     """
     return Piece(5, 0, random.choice(shapes))
 
+fonts = {}  # (name, size, bold) -> Font
+labels = OrderedDict()  # (text, font, color) -> rendered Surface, least recently used first
+label_cache_size = 64
+
+def get_font(name, size, bold=False):
+    """
+    Look up a font by face and size, creating it with SysFont the first time.
+    """
+    key = (name, size, bold)
+    font = fonts.get(key)
+    if font is None:
+        font = fonts[key] = pygame.font.SysFont(name, size, bold=bold)
+    return font
+
+def render_label(text, font, color):
+    """
+    Render text once and reuse the Surface until it falls out of the LRU cache.
+    """
+    key = (text, font, color)
+    label = labels.get(key)
+    if label is None:
+        label = labels[key] = font.render(text, 1, color)
+        if len(labels) > label_cache_size:
+            labels.popitem(last=False)  # drop the least recently used label
+    else:
+        labels.move_to_end(key)
+    return label
+
 def draw_text_middle(text, size, color, surface):
     """
     Draw text in the middle of the given surface.
     """
-    font = pygame.font.SysFont('comicsans', size, bold=True)
-    label = font.render(text, 1, color)
+    label = render_label(text, get_font('comicsans', size, bold=True), color)
 
     surface.blit(label, (top_left_x + play_width / 2 - (label.get_width() / 2),
                          top_left_y + play_height / 2 - (label.get_height() / 2)))
@@ -251,35 +280,39 @@ def clear_rows(grid, locked):
     Check for complete rows and clear them. Then, move every row above down.
     Each cleared row adds to the score.
     """
-    inc = 0
-    # Start from the bottom of the grid
+    # Walk the rows bottom-up once, mapping every kept row to its new index
+    full_rows = set()
+    row_map = {}
     for i in range(len(grid) - 1, -1, -1):
-        row = grid[i]
-        # If the row has no empty blocks
-        if (0, 0, 0) not in row:
-            inc += 1
-            ind = i
-            # Remove the positions in this row from the locked positions
-            for j in range(len(row)):
-                try:
-                    del locked[(j, i)]
-                except:
-                    continue
-    # Move every locked position above down by the number of cleared rows
+        if (0, 0, 0) not in grid[i]:
+            full_rows.add(i)
+        else:
+            row_map[i] = i + len(full_rows)
+    inc = len(full_rows)
+
     if inc > 0:
-        for key in sorted(list(locked), key=lambda x: x[1], reverse=True):
-            x, y = key
-            if y < ind:
-                newKey = (x, y + inc)
-                locked[newKey] = locked.pop(key)
+        # Apply the remap in one pass; positions above the grid shift by every cleared row
+        shifted = {}
+        for (x, y), color in locked.items():
+            if y not in full_rows:
+                shifted[(x, row_map.get(y, y + inc))] = color
+        locked.clear()
+        locked.update(shifted)
+
+        # Compact the grid the same way so it stays in step with the locked positions
+        grid[:] = [[(0, 0, 0) for _ in range(10)] for _ in range(inc)] + \
+            [grid[i] for i in range(len(grid)) if i not in full_rows]
+        # Blocks locked above the grid land in the empty rows added at the top
+        for (x, y), color in shifted.items():
+            if 0 <= y < inc:
+                grid[y][x] = color
     return inc
 
 def draw_next_shape(piece, surface):
     """
     Draw the next shape that will fall on the side of the play area.
     """
-    font = pygame.font.SysFont('comicsans', 30)
-    label = font.render('Next Shape', 1, (255, 255, 255))
+    label = render_label('Next Shape', get_font('comicsans', 30), (255, 255, 255))
 
     sx = top_left_x + play_width + 50
     sy = top_left_y + play_height / 2 - 100
@@ -302,13 +335,11 @@ def draw_window(surface, grid, score=0):
     surface.fill((0, 0, 0))  # fill background with black
 
     # Draw the title
-    font = pygame.font.SysFont('comicsans', 60)
-    label = font.render('Tetris', 1, (255, 255, 255))
+    label = render_label('Tetris', get_font('comicsans', 60), (255, 255, 255))
     surface.blit(label, (top_left_x + play_width / 2 - (label.get_width() / 2), 30))
 
     # Draw the current score
-    font = pygame.font.SysFont('comicsans', 30)
-    label = font.render('Score: ' + str(score), 1, (255, 255, 255))
+    label = render_label('Score: ' + str(score), get_font('comicsans', 30), (255, 255, 255))
     sx = top_left_x + play_width + 50
     sy = top_left_y + play_height / 2 - 100
     surface.blit(label, (sx + 20, sy + 160))
@@ -435,11 +466,64 @@ def main_menu(win):
                 main(win)
     pygame.quit()
 
+############################
+# Self-check
+############################
+
+def reference_clear_rows(locked):
+    """
+    Simple version of clear_rows to check it against: rebuild the rows from
+    the locked positions, drop the full ones and pad the top.
+    Returns (locked, grid, cleared rows).
+    """
+    rows = {}
+    for (x, y), color in locked.items():
+        rows.setdefault(y, {})[x] = color
+    full = [y for y in range(20) if len(rows.get(y, ())) == 10]
+    kept = {}
+    for y, row in rows.items():
+        if y not in full:
+            # Every full row below moves this row down by one
+            new_y = y + sum(1 for f in full if f > y)
+            for x, color in row.items():
+                kept[(x, new_y)] = color
+    return kept, create_grid(kept), len(full)
+
+def verify_clear_rows(boards=1000000, seed=0):
+    """
+    Run clear_rows and reference_clear_rows on the same random boards and
+    count the boards where the locked positions, grid or cleared count differ.
+    """
+    rng = random.Random(seed)
+    failures = 0
+    for board in range(boards):
+        locked = {}
+        # Rows are often full; a few cells sit above the visible grid
+        for y in range(-3, 20):
+            fill = 1.0 if y >= 0 and rng.random() < 0.3 else rng.random() * (0.2 if y < 0 else 0.9)
+            for x in range(10):
+                if rng.random() < fill:
+                    locked[(x, y)] = rng.choice(shape_colors)
+        expected = reference_clear_rows(locked)
+        grid = create_grid(locked)
+        cleared = clear_rows(grid, locked)
+        if (locked, grid, cleared) != expected:
+            failures += 1
+            if failures <= 3:
+                print("board %d: clear_rows disagrees with the reference" % board)
+    print("%d boards, %d mismatches" % (boards, failures))
+    return failures
+
 ############################
 # Program Entry Point
 ############################
 
 if __name__ == '__main__':
+    if '--verify' in sys.argv:
+        # --verify N checks N boards instead of the default
+        args = sys.argv[sys.argv.index('--verify') + 1:]
+        boards = int(args[0]) if args and args[0].isdigit() else 1000000
+        sys.exit(1 if verify_clear_rows(boards) else 0)
     # Create the game window
     win = pygame.display.set_mode((s_width, s_height))
     pygame.display.set_caption('Tetris')
@@ -1,5 +1,8 @@
 import pygame
 import random
+import sys
+import time
+from collections import OrderedDict, namedtuple
 
 # Initialize Pygame and its font module
 pygame.init()
@@ -21,6 +24,14 @@ block_size = 30
 top_left_x = (s_width - play_width) // 2
 top_left_y = s_height - play_height - 50
 
+# Simulation clock: gravity and speed-up count whole logic ticks, never wall-clock time
+tick_rate = 200  # logic ticks per second of game time
+fall_ticks_start = 54  # ticks per gravity step at the start (0.27 s)
+fall_ticks_min = 24  # fastest gravity (0.12 s)
+speed_up_ticks = 1000  # gravity gets one tick faster every 5 s of game time
+render_fps = 60  # rendering runs on its own clock and never changes the game
+menu_redraw_ms = 1000  # the idle start screen sleeps on the event queue and redraws this often
+
 # -------------------------
 # Define the Tetris Shapes
 # -------------------------
@@ -141,18 +152,40 @@ shape_colors = [
 ]
 
 
+# A piece reduced to plain values (see Piece.get_state)
+PieceState = namedtuple('PieceState', ['shape_index', 'rotation', 'x', 'y'])
+
+
 # ---------------------
 # Piece Class
 # ---------------------
 class Piece:
+    __slots__ = ('x', 'y', 'shape', 'shape_index', 'color', 'rotation')
+
     def __init__(self, x, y, shape):
         self.x = x  # grid x position
         self.y = y  # grid y position
         self.shape = shape
+        self.shape_index = shapes.index(shape)
         # Color is chosen based on the shape's index
-        self.color = shape_colors[shapes.index(shape)]
+        self.color = shape_colors[self.shape_index]
         self.rotation = 0  # current rotation state
 
+    @classmethod
+    def from_state(cls, state):
+        """
+        Create a piece from a PieceState.
+        """
+        piece = cls(state.x, state.y, shapes[state.shape_index])
+        piece.rotation = state.rotation
+        return piece
+
+    def get_state(self):
+        """
+        Return the piece as an immutable PieceState.
+        """
+        return PieceState(self.shape_index, self.rotation % len(self.shape), self.x, self.y)
+
 
 # -----------------------------
 # Grid and Game Utility Functions
@@ -214,19 +247,52 @@ def check_lost(positions):
     return False
 
 
-def get_shape():
+def get_shape(rng=random):
     """
     Return a random new piece starting near the top middle of the grid.
     """
-    return Piece(5, 0, random.choice(shapes))
+    return Piece(5, 0, rng.choice(shapes))
+
+
+fonts = {}  # (name, size, bold) -> Font
+labels = OrderedDict()  # (text, font, color) -> rendered Surface, least recently used first
+label_cache_size = 64
+
+
+def get_font(name, size, bold=False):
+    """
+    Return the system font for a face and size.
+    SysFont scans the installed fonts, so each one is only loaded once.
+    """
+    key = (name, size, bold)
+    font = fonts.get(key)
+    if font is None:
+        font = fonts[key] = pygame.font.SysFont(name, size, bold=bold)
+    return font
+
+
+def render_label(text, font, color):
+    """
+    Return the rendered text for (text, font, color).
+    Labels are kept in a small LRU cache, so a score label is only
+    rendered again when the score changes.
+    """
+    key = (text, font, color)
+    label = labels.get(key)
+    if label is None:
+        label = labels[key] = font.render(text, 1, color)
+        if len(labels) > label_cache_size:
+            labels.popitem(last=False)  # drop the least recently used label
+    else:
+        labels.move_to_end(key)
+    return label
 
 
 def draw_text_middle(text, size, color, surface):
     """
     Draw centered text on the surface.
     """
-    font = pygame.font.SysFont('comicsans', size, bold=True)
-    label = font.render(text, 1, color)
+    label = render_label(text, get_font('comicsans', size, bold=True), color)
 
     surface.blit(
         label,
@@ -235,19 +301,69 @@ def draw_text_middle(text, size, color, surface):
     )
 
 
-def draw_grid(surface, grid):
+def draw_grid(surface):
     """
-    Draw grid lines on the play area.
+    Draw grid lines on the play area, one line per row and per column.
     """
     sx = top_left_x
     sy = top_left_y
-    for i in range(len(grid)):
+    for i in range(20):
         # Draw horizontal lines
         pygame.draw.line(surface, (128, 128, 128), (sx, sy + i * block_size), (sx + play_width, sy + i * block_size))
-        for j in range(len(grid[i])):
-            # Draw vertical lines
-            pygame.draw.line(surface, (128, 128, 128), (sx + j * block_size, sy),
-                             (sx + j * block_size, sy + play_height))
+    for j in range(10):
+        # Draw vertical lines
+        pygame.draw.line(surface, (128, 128, 128), (sx + j * block_size, sy),
+                         (sx + j * block_size, sy + play_height))
+
+
+def build_background(size):
+    """
+    Render the static layer of the game window: background, title, red border and grid lines.
+    """
+    background = pygame.Surface(size)
+    background.fill((0, 0, 0))
+
+    # Draw Tetris title
+    label = render_label('Tetris', get_font('comicsans', 60), (255, 255, 255))
+    background.blit(label, (top_left_x + play_width / 2 - label.get_width() / 2, 30))
+
+    # The empty play area is drawn over the title, just like the black grid cells were
+    pygame.draw.rect(background, (0, 0, 0), (top_left_x, top_left_y, play_width, play_height), 0)
+
+    # Draw a red border around the play area
+    pygame.draw.rect(background, (255, 0, 0), (top_left_x, top_left_y, play_width, play_height), 4)
+    draw_grid(background)
+    return background
+
+
+background_cache = {}  # window size -> static layer
+
+
+def get_background(surface):
+    """
+    Return the cached static layer for the surface.
+    It is only rebuilt when the window size changes.
+    """
+    size = surface.get_size()
+    background = background_cache.get(size)
+    if background is None:
+        background_cache.clear()
+        background = background_cache[size] = build_background(size).convert(surface)
+    return background
+
+
+# Cells are drawn inside the border and the grid lines so the static layer shows through
+cell_clip = pygame.Rect(top_left_x + 4, top_left_y + 4, play_width - 8, play_height - 8)
+
+
+def draw_cell(surface, color, x, y):
+    """
+    Fill one play area cell, leaving its grid lines untouched.
+    """
+    pygame.draw.rect(
+        surface, color,
+        (top_left_x + x * block_size + 1, top_left_y + y * block_size + 1, block_size - 1, block_size - 1), 0
+    )
 
 
 def clear_rows(grid, locked):
@@ -255,49 +371,59 @@ def clear_rows(grid, locked):
     Check for complete rows in the grid and remove them.
     Moves all rows above cleared rows down.
     """
-    inc = 0
+    # Walk the rows bottom-up once, mapping every kept row to its new index
+    full_rows = set()
+    row_map = {}
     for i in range(len(grid) - 1, -1, -1):
-        row = grid[i]
-        if (0, 0, 0) not in row:
-            inc += 1
-            ind = i
-            # Remove positions in the full row from locked positions
-            for j in range(len(row)):
-                try:
-                    del locked[(j, i)]
-                except KeyError:
-                    continue
+        if (0, 0, 0) not in grid[i]:
+            full_rows.add(i)
+        else:
+            row_map[i] = i + len(full_rows)
+    inc = len(full_rows)
+
     if inc > 0:
-        # Shift every position above the cleared row down by the number of cleared rows.
-        for key in sorted(list(locked), key=lambda x: x[1], reverse=True):
-            x, y = key
-            if y < ind:
-                newKey = (x, y + inc)
-                locked[newKey] = locked.pop(key)
+        # Apply the remap in one pass; positions above the grid shift by every cleared row
+        shifted = {}
+        for (x, y), color in locked.items():
+            if y not in full_rows:
+                shifted[(x, row_map.get(y, y + inc))] = color
+        locked.clear()
+        locked.update(shifted)
+
+        # Compact the grid the same way so it stays in step with the locked positions
+        grid[:] = [[(0, 0, 0) for _ in range(10)] for _ in range(inc)] + \
+            [grid[i] for i in range(len(grid)) if i not in full_rows]
+        # Blocks locked above the grid land in the empty rows added at the top
+        for (x, y), color in shifted.items():
+            if 0 <= y < inc:
+                grid[y][x] = color
     return inc
 
 
-def draw_next_shape(piece, surface):
+def draw_next_shape(piece, surface, dirty=None):
     """
     Display the next piece on the side.
     """
-    font = pygame.font.SysFont('comicsans', 30)
-    label = font.render('Next Shape', 1, (255, 255, 255))
+    label = render_label('Next Shape', get_font('comicsans', 30), (255, 255, 255))
 
     sx = top_left_x + play_width + 50
     sy = top_left_y + play_height / 2 - 100
     format = piece.shape[piece.rotation % len(piece.shape)]
 
+    area = pygame.Rect(sx, sy, 0, 0)
     for i, line in enumerate(format):
         row = list(line)
         for j, column in enumerate(row):
             if column == '0':
-                pygame.draw.rect(
+                area.union_ip(pygame.draw.rect(
                     surface, piece.color,
                     (sx + j * block_size, sy + i * block_size, block_size, block_size), 0
-                )
+                ))
     surface.blit(label, (sx + 10, sy - 30))
 
+    if dirty is not None:
+        dirty.mark('next', area, (format, piece.color))
+
 
 def update_score(new_score):
     """
@@ -324,82 +450,221 @@ def max_score():
     return score
 
 
-def draw_window(surface, grid, score=0, last_score=0):
+def draw_piece(surface, piece):
     """
-    Draw the main game window including the grid, title, score, and high score.
+    Draw the falling piece on top of the grid cells (it is never written into the grid).
     """
-    surface.fill((0, 0, 0))
+    for x, y in convert_shape_format(piece):
+        if y > -1:
+            draw_cell(surface, piece.color, x, y)
 
-    # Draw Tetris title
-    font = pygame.font.SysFont('comicsans', 60)
-    label = font.render('Tetris', 1, (255, 255, 255))
-    surface.blit(label, (top_left_x + play_width / 2 - label.get_width() / 2, 30))
+
+def draw_window(surface, grid, score=0, last_score=0, piece=None, dirty=None):
+    """
+    Draw the main game window including the grid, title, score, and high score.
+    The title, border and grid lines come from the cached background; only
+    filled cells and the falling piece are drawn on top of it.
+    If dirty is given, every play area row and label is marked on it.
+    """
+    surface.blit(get_background(surface), (0, 0))
 
     # Current score
-    font = pygame.font.SysFont('comicsans', 30)
-    label = font.render('Score: ' + str(score), 1, (255, 255, 255))
+    font = get_font('comicsans', 30)
+    label = render_label('Score: ' + str(score), font, (255, 255, 255))
     sx = top_left_x - 200
     sy = top_left_y + 200
-    surface.blit(label, (sx + 20, sy + 160))
+    score_rect = surface.blit(label, (sx + 20, sy + 160))
 
     # High score
-    label = font.render('High Score: ' + last_score, 1, (255, 255, 255))
+    label = render_label('High Score: ' + last_score, font, (255, 255, 255))
     sx = top_left_x - 200
     sy = top_left_y + 100
-    surface.blit(label, (sx + 20, sy + 160))
+    high_score_rect = surface.blit(label, (sx + 20, sy + 160))
 
-    # Draw the grid blocks
+    # Draw the grid blocks (empty cells are already black in the background)
+    surface.set_clip(cell_clip)
     for i in range(len(grid)):
         for j in range(len(grid[i])):
-            pygame.draw.rect(
-                surface, grid[i][j],
-                (top_left_x + j * block_size, top_left_y + i * block_size, block_size, block_size), 0
-            )
+            if grid[i][j] != (0, 0, 0):
+                draw_cell(surface, grid[i][j], j, i)
+    if piece is not None:
+        draw_piece(surface, piece)
+    surface.set_clip(None)
+
+    if dirty is not None:
+        dirty.mark('score', score_rect, score)
+        dirty.mark('high score', high_score_rect, last_score)
+        piece_cells = convert_shape_format(piece) if piece is not None else []
+        for i in range(len(grid)):
+            row_piece = tuple(x for x, y in piece_cells if y == i)
+            dirty.mark(('row', i), pygame.Rect(top_left_x, top_left_y + i * block_size, play_width, block_size),
+                       (tuple(grid[i]), row_piece, piece.color if row_piece else None))
+
+
+class DirtyRects:
+    """
+    Track what each region of the window showed on the previous frame.
+    Regions whose value changed are collected (old and new rect), and
+    update() sends only those to the display instead of the whole window.
+    """
 
-    # Draw a red border around the play area
-    pygame.draw.rect(surface, (255, 0, 0), (top_left_x, top_left_y, play_width, play_height), 4)
-    draw_grid(surface, grid)
+    def __init__(self):
+        self.shown = {}  # key -> (rect, value) last sent to the display
+        self.rects = []
+        self.full = True  # the very first frame is sent whole
+
+    def mark(self, key, rect, value):
+        """
+        Record the rect and value of a region for this frame.
+        """
+        old = self.shown.get(key)
+        if old is not None and old[1] == value:
+            return
+        self.shown[key] = (rect, value)
+        self.rects.append(rect)
+        if old is not None and old[0] != rect:
+            self.rects.append(old[0])
+
+    def invalidate(self):
+        """
+        Send the whole window on the next update, e.g. after it was uncovered.
+        """
+        self.full = True
+
+    def update(self):
+        """
+        Send the changed regions to the display.
+        """
+        if self.full:
+            pygame.display.update()
+            self.full = False
+        elif self.rects:
+            pygame.display.update(self.rects)
+        self.rects.clear()
+
+
+# ---------------------
+# Game State
+# ---------------------
+class Game:
+    """
+    The game logic, advanced one fixed logic tick at a time.
+    Given the same seed and the same keys on the same ticks it always plays
+    out the same way, however fast or slow the machine is.
+    """
+
+    def __init__(self, seed=None):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.locked_positions = {}  # (x, y):(R, G, B)
+        # Lives for the whole game; only changes when a piece locks or rows clear
+        self.grid = create_grid(self.locked_positions)
+        self.current_piece = get_shape(self.rng)
+        self.next_piece = get_shape(self.rng)
+        self.change_piece = False
+        self.score = 0
+        self.lost = False
+
+        self.ticks = 0  # logic ticks played so far
+        self.fall_ticks = 0  # ticks since the last gravity step
+        self.fall_interval = fall_ticks_start
+        # (tick, key) of every key handled; with seed, run_headless(input_log, seed) replays the game
+        self.input_log = []
+
+    def handle_key(self, key):
+        """
+        Apply one key press to the falling piece.
+        """
+        self.input_log.append((self.ticks, key))
+        current_piece = self.current_piece
+        grid = self.grid
+        if key == pygame.K_LEFT:
+            current_piece.x -= 1
+            if not valid_space(current_piece, grid):
+                current_piece.x += 1
+        if key == pygame.K_RIGHT:
+            current_piece.x += 1
+            if not valid_space(current_piece, grid):
+                current_piece.x -= 1
+        if key == pygame.K_DOWN:
+            current_piece.y += 1
+            if not valid_space(current_piece, grid):
+                current_piece.y -= 1
+        if key == pygame.K_UP:
+            # Rotate the piece
+            current_piece.rotation = (current_piece.rotation + 1) % len(current_piece.shape)
+            if not valid_space(current_piece, grid):
+                current_piece.rotation = (current_piece.rotation - 1) % len(current_piece.shape)
+
+    def tick(self):
+        """
+        Advance the game by one logic tick: speed-up, gravity and locking.
+        """
+        self.ticks += 1
+
+        # Gradually speed up the falling pieces
+        if self.ticks % speed_up_ticks == 0 and self.fall_interval > fall_ticks_min:
+            self.fall_interval -= 1
+
+        # Move the current piece down based on the fall interval
+        self.fall_ticks += 1
+        if self.fall_ticks >= self.fall_interval:
+            self.fall_ticks = 0
+            self.current_piece.y += 1
+            if not valid_space(self.current_piece, self.grid) and self.current_piece.y > 0:
+                self.current_piece.y -= 1
+                self.change_piece = True
+
+        # If piece has landed, lock it in and get a new piece
+        if self.change_piece:
+            for x, y in convert_shape_format(self.current_piece):
+                self.locked_positions[(x, y)] = self.current_piece.color
+                if y > -1:
+                    self.grid[y][x] = self.current_piece.color
+            self.current_piece = self.next_piece
+            self.next_piece = get_shape(self.rng)
+            self.change_piece = False
+            # Increase score for each cleared row
+            cleared = clear_rows(self.grid, self.locked_positions)
+            if cleared:
+                self.score += cleared * 10
+            self.lost = check_lost(self.locked_positions)
+
+
+def run_headless(inputs=(), seed=None, max_ticks=None):
+    """
+    Play a game without a window, as fast as the CPU allows.
+    inputs is a sequence of (tick, key) pairs, such as a Game's input_log.
+    Returns the finished Game.
+    """
+    game = Game(seed)
+    inputs = sorted(inputs, key=lambda entry: entry[0])
+    next_input = 0
+    while not game.lost and (max_ticks is None or game.ticks < max_ticks):
+        while next_input < len(inputs) and inputs[next_input][0] <= game.ticks:
+            game.handle_key(inputs[next_input][1])
+            next_input += 1
+        game.tick()
+    return game
 
 
 # ---------------------
 # Main Game Loop
 # ---------------------
 def main(win):
+    """
+    Play one game in the window and return it, so that it can be replayed
+    from its seed and input_log.
+    """
     last_score = max_score()
-    locked_positions = {}  # (x, y):(R, G, B)
-    grid = create_grid(locked_positions)
-
-    change_piece = False
-    run = True
-    current_piece = get_shape()
-    next_piece = get_shape()
+    # Pick the seed here rather than letting Random seed itself, so it can be kept
+    game = Game(random.randrange(2 ** 32))
     clock = pygame.time.Clock()
-    fall_time = 0
-    fall_speed = 0.27  # lower is faster
-    level_time = 0
-    score = 0
+    dirty = DirtyRects()
+    start = pygame.time.get_ticks()
+    run = True
 
     while run:
-        grid = create_grid(locked_positions)
-        # Increase fall_time based on clock ticks
-        fall_time += clock.get_rawtime()
-        level_time += clock.get_rawtime()
-        clock.tick()
-
-        # Gradually speed up the falling pieces
-        if level_time / 1000 > 5:
-            level_time = 0
-            if fall_speed > 0.12:
-                fall_speed -= 0.005
-
-        # Move the current piece down based on fall_speed
-        if fall_time / 1000 >= fall_speed:
-            fall_time = 0
-            current_piece.y += 1
-            if not valid_space(current_piece, grid) and current_piece.y > 0:
-                current_piece.y -= 1
-                change_piece = True
-
         # Event handling (keyboard input)
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -408,55 +673,55 @@ def main(win):
                 quit()
 
             if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_LEFT:
-                    current_piece.x -= 1
-                    if not valid_space(current_piece, grid):
-                        current_piece.x += 1
-                if event.key == pygame.K_RIGHT:
-                    current_piece.x += 1
-                    if not valid_space(current_piece, grid):
-                        current_piece.x -= 1
-                if event.key == pygame.K_DOWN:
-                    current_piece.y += 1
-                    if not valid_space(current_piece, grid):
-                        current_piece.y -= 1
-                if event.key == pygame.K_UP:
-                    # Rotate the piece
-                    current_piece.rotation = (current_piece.rotation + 1) % len(current_piece.shape)
-                    if not valid_space(current_piece, grid):
-                        current_piece.rotation = (current_piece.rotation - 1) % len(current_piece.shape)
-
-        # Add piece to the grid for drawing
-        shape_pos = convert_shape_format(current_piece)
-        for pos in shape_pos:
-            x, y = pos
-            if y > -1:
-                grid[y][x] = current_piece.color
+                game.handle_key(event.key)
 
-        # If piece has landed, lock it in and get a new piece
-        if change_piece:
-            for pos in shape_pos:
-                locked_positions[(pos[0], pos[1])] = current_piece.color
-            current_piece = next_piece
-            next_piece = get_shape()
-            change_piece = False
-            # Increase score for each cleared row
-            cleared = clear_rows(grid, locked_positions)
-            if cleared:
-                score += cleared * 10
+            # Uncovered or restored: only changed regions are sent, so resend the static parts too
+            if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                dirty.invalidate()
 
-        # Redraw the window and update display
-        draw_window(win, grid, score, last_score)
-        draw_next_shape(next_piece, win)
-        pygame.display.update()
+        # Play every logic tick that is due by now; after a long stall, skip ahead instead
+        due = (pygame.time.get_ticks() - start) * tick_rate // 1000
+        if due - game.ticks > tick_rate:
+            start += (due - game.ticks - tick_rate) * 1000 // tick_rate
+            due = game.ticks + tick_rate
+        while game.ticks < due and not game.lost:
+            game.tick()
+
+        # Redraw the window (falling piece as an overlay) and send only what changed to the display
+        draw_window(win, game.grid, game.score, last_score, game.current_piece, dirty)
+        draw_next_shape(game.next_piece, win, dirty)
+        dirty.update()
 
         # Check if the game is over
-        if check_lost(locked_positions):
+        if game.lost:
             draw_text_middle("YOU LOST!", 80, (255, 255, 255), win)
             pygame.display.update()
             pygame.time.delay(1500)
             run = False
-            update_score(score)
+            update_score(game.score)
+
+        # Rendering has its own cap; it only decides how often the ticks above get caught up
+        clock.tick(render_fps)
+    return game
+
+
+def benchmark_headless(seed=0, ticks=200000):
+    """
+    Time seeded headless games with random key presses until ticks have been
+    played, and print the tick rate.
+    """
+    rng = random.Random(seed)
+    keys = [pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN]
+    played = games = 0
+    start = time.perf_counter()
+    while played < ticks:
+        inputs = [(tick, rng.choice(keys)) for tick in range(0, ticks - played, 20)]
+        game = run_headless(inputs, seed + games, ticks - played)
+        played += game.ticks
+        games += 1
+    elapsed = time.perf_counter() - start
+    print(f"{played} ticks ({played / tick_rate:.0f} s of game time, {games} games) in {elapsed:.2f} s: "
+          f"{played / elapsed:,.0f} ticks/s")
 
 
 # ---------------------
@@ -467,22 +732,82 @@ def main_menu(win):
     Displays the start screen and waits for a key press to start the game.
     """
     run = True
+    redraw = True
     while run:
-        win.fill((0, 0, 0))
-        draw_text_middle("Press Any Key To Play", 60, (255, 255, 255), win)
-        pygame.display.update()
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                run = False
-            if event.type == pygame.KEYDOWN:
-                main(win)
+        if redraw:
+            win.fill((0, 0, 0))
+            draw_text_middle("Press Any Key To Play", 60, (255, 255, 255), win)
+            pygame.display.update()
+
+        # Block until something happens; NOEVENT means the redraw timeout ran out
+        event = pygame.event.wait(menu_redraw_ms)
+        redraw = event.type in (pygame.NOEVENT, pygame.VIDEOEXPOSE)
+        if event.type == pygame.QUIT:
+            run = False
+        if event.type == pygame.KEYDOWN:
+            main(win)
+            redraw = True
     pygame.quit()
 
 
+def reference_clear_rows(locked):
+    """
+    Straightforward clear_rows for checking the fast one: rebuild the rows,
+    drop the full ones and pad the top. Returns (locked, grid, cleared).
+    """
+    rows = {}
+    for (x, y), color in locked.items():
+        rows.setdefault(y, {})[x] = color
+    full = [y for y in range(20) if len(rows.get(y, ())) == 10]
+    kept = {}
+    for y, row in rows.items():
+        if y not in full:
+            # A row drops by the number of full rows below it
+            new_y = y + sum(1 for f in full if f > y)
+            for x, color in row.items():
+                kept[(x, new_y)] = color
+    return kept, create_grid(kept), len(full)
+
+
+def verify_clear_rows(boards=1000000, seed=0):
+    """
+    Compare clear_rows with reference_clear_rows on random boards (full rows
+    biased, cells above the grid included), checking both the locked positions
+    and the grid. Returns the number of mismatching boards.
+    """
+    rng = random.Random(seed)
+    colors = shape_colors
+    failures = 0
+    for board in range(boards):
+        locked = {}
+        for y in range(-3, 20):
+            fill = 1.0 if y >= 0 and rng.random() < 0.3 else rng.random() * (0.2 if y < 0 else 0.9)
+            for x in range(10):
+                if rng.random() < fill:
+                    locked[(x, y)] = rng.choice(colors)
+        expected_locked, expected_grid, expected_cleared = reference_clear_rows(locked)
+        grid = create_grid(locked)
+        cleared = clear_rows(grid, locked)
+        if (locked, grid, cleared) != (expected_locked, expected_grid, expected_cleared):
+            failures += 1
+            if failures <= 3:
+                print(f"board {board}: clear_rows disagrees with the reference")
+    print(f"{boards} boards, {failures} mismatches")
+    return failures
+
+
 # ---------------------
 # Program Entry Point
 # ---------------------
 if __name__ == '__main__':
+    if '--headless' in sys.argv:
+        benchmark_headless()
+        sys.exit()
+    if '--verify' in sys.argv:
+        # Optional board count after the flag, e.g. --verify 5000000
+        args = sys.argv[sys.argv.index('--verify') + 1:]
+        boards = int(args[0]) if args and args[0].isdigit() else 1000000
+        sys.exit(1 if verify_clear_rows(boards) else 0)
     win = pygame.display.set_mode((s_width, s_height))
     pygame.display.set_caption('Tetris')
     main_menu(win)